@@ -0,0 +1,214 @@
+
+"""
+Cliente compartido de la base de analítica (Supabase, pooler en el puerto 6543).
+
+Uso:
+    from db import connection, fetchall, stream
+
+    rows = fetchall("SELECT skill, total_users FROM public_analytics.top_skills_report")
+
+    with connection() as conn:          # conexión prestada del pool
+        cur = conn.cursor()
+        ...
+
+    with stream("SELECT * FROM public_analytics.top_skills_report") as cur:
+        for row in cur:                 # cursor del servidor, filas por lotes
+            ...
+
+Un proceso abre un único ThreadedConnectionPool y reutiliza sus conexiones
+entre consultas, así el handshake TLS + auth con el pooler se paga una vez
+por conexión y no una vez por consulta. Las conexiones usan TCP keepalives
+para que el pooler no las corte en silencio, y los fallos de conexión se
+reintentan con backoff exponencial (con jitter).
+"""
+
+import atexit
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2 import pool as pg_pool
+
+# ============ CONFIGURACIÓN ============
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "aws-0-us-west-2.pooler.supabase.com"),
+    "database": os.environ.get("DB_NAME", "postgres"),
+    "user": os.environ.get("DB_USER", "postgres.fytyfeapxgswxkecneom"),
+    "password": os.environ.get("DB_PASSWORD"),
+    "port": int(os.environ.get("DB_PORT", 6543)),
+    "connect_timeout": 10,
+    # TCP keepalives: detectan conexiones muertas y evitan que el pooler cierre las ociosas
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 3,
+    "application_name": "novawork-analytics",
+}
+
+POOL_MIN = 1
+POOL_MAX = int(os.environ.get("DB_POOL_MAX", 8))
+
+ITERSIZE = 2000       # filas por viaje al servidor en stream()
+
+RETRIES = 3            # reintentos tras el primer intento
+BACKOFF_BASE = 0.5     # segundos; se duplica en cada reintento
+BACKOFF_MAX = 8.0
+
+# Errores de conexión / red: la consulta no llegó a completarse y se puede repetir
+RETRYABLE = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+# ============ REINTENTOS ============
+def is_retryable(exc):
+    """Error de conexión; un statement_timeout (QueryCanceledError) no se repite"""
+    return isinstance(exc, RETRYABLE) and not isinstance(exc, extensions.QueryCanceledError)
+
+
+def backoff(attempt):
+    """Espera (segundos) antes del reintento `attempt` (0, 1, 2...): exponencial con jitter"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def with_retry(fn, retries=RETRIES):
+    """Ejecuta fn(); si falla con un error de conexión, reintenta con backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except RETRYABLE as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            time.sleep(backoff(attempt))
+
+
+# ============ POOL ============
+def get_pool():
+    """Pool del proceso, creado en el primer uso"""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = with_retry(lambda: pg_pool.ThreadedConnectionPool(POOL_MIN, POOL_MAX, **DB_CONFIG))
+            # getconn() falla si el pool está agotado; el semáforo hace esperar al hilo en su lugar
+            _slots = threading.BoundedSemaphore(POOL_MAX)
+        return _pool
+
+
+def close_pool():
+    """Cierra todas las conexiones del pool (se llama también al salir del proceso)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+
+
+atexit.register(close_pool)
+
+
+@contextmanager
+def connection():
+    """Presta una conexión del pool y la devuelve al salir.
+
+    Una transacción abierta se deshace antes de devolverla (en modo transacción
+    el pooler no libera la conexión del servidor mientras siga abierta); una
+    conexión rota se descarta en lugar de volver al pool.
+    """
+    pool = get_pool()
+    slots = _slots
+    slots.acquire()
+    conn = None
+    broken = False
+    try:
+        conn = with_retry(pool.getconn)
+        yield conn
+    except RETRYABLE as e:
+        broken = is_retryable(e)
+        raise
+    finally:
+        if conn is not None:
+            broken = broken or conn.closed != 0
+            if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    # p. ej. un COPY interrumpido a medias: la conexión no es reutilizable
+                    broken = True
+            pool.putconn(conn, close=broken)
+        slots.release()
+
+
+# ============ CONSULTAS ============
+def set_timeout(cur, timeout):
+    """statement_timeout (segundos) para la transacción en curso.
+
+    SET LOCAL y no SET: con el pooler en modo transacción un SET de sesión
+    se quedaría en la conexión del servidor para el siguiente cliente.
+    """
+    if timeout:
+        cur.execute("SET LOCAL statement_timeout = %s", (int(timeout * 1000),))
+
+
+def fetchall(query, params=None, retries=RETRIES, timeout=None):
+    """Ejecuta una consulta de lectura y devuelve todas sus filas.
+
+    Si la conexión se cae (p. ej. una conexión ociosa cortada por el pooler)
+    se descarta y la consulta se repite con otra conexión. Con `timeout`
+    (segundos) el servidor cancela la consulta y se lanza QueryCanceledError.
+    """
+    def attempt():
+        with connection() as conn:
+            with conn.cursor() as cur:
+                set_timeout(cur, timeout)
+                cur.execute(query, params)
+                return cur.fetchall()
+
+    return with_retry(attempt, retries)
+
+
+@contextmanager
+def stream(query, params=None, itersize=ITERSIZE, timeout=None):
+    """Cursor del servidor (named cursor) para resultados grandes.
+
+    Iterar el cursor trae las filas en lotes de `itersize`, así la memoria
+    no crece con el tamaño del resultado. cur.description está disponible
+    tras leer la primera fila. No se reintenta: parte de las filas ya pudo
+    haberse consumido.
+
+        with stream("SELECT * FROM public_analytics.top_skills_report") as cur:
+            for row in cur:
+                ...
+    """
+    with connection() as conn:
+        with conn.cursor() as cur:
+            set_timeout(cur, timeout)
+        # Un named cursor vive dentro de la transacción; connection() la cierra al salir
+        with conn.cursor(name="stream_" + uuid.uuid4().hex) as cur:
+            cur.itersize = itersize
+            cur.execute(query, params)
+            yield cur
+
+
+def fetch_concurrently(queries, timeout=None, max_workers=None, fetch=fetchall):
+    """Ejecuta consultas independientes en paralelo, cada una con su conexión del pool.
+
+    `queries` es una lista de SQL o de tuplas (SQL, params). Devuelve un
+    iterador de futures en el orden declarado: future.result() da las filas
+    o relanza el error de esa consulta. La latencia total es la de la
+    consulta más lenta, no la suma. `fetch` permite sustituir fetchall
+    (p. ej. por result_cache.cached_fetchall).
+    """
+    queries = [(q, None) if isinstance(q, str) else q for q in queries]
+    workers = max_workers or min(len(queries), POOL_MAX) or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fetch, query, params, timeout=timeout) for query, params in queries]
+        yield from futures
@@ -0,0 +1,243 @@
+
+"""
+Exporta los marts de public_analytics y las vistas stg_* a archivos locales.
+
+Uso:
+    python export_marts.py                               # CSV gzip en exports/<fecha>/
+    python export_marts.py --format parquet --workers 4
+    python export_marts.py --tables top_skills_report stg_user_skills
+
+Cada tabla se vuelca con COPY ... TO STDOUT y los bytes van directo al
+archivo comprimido (CSV gzip) o, para Parquet, a un lector CSV de pyarrow
+que escribe un row group por bloque. Ninguna fila pasa por Python una a
+una y nunca se carga una tabla entera en memoria. Varias tablas se
+exportan en paralelo, cada una con su conexión del pool.
+"""
+
+import argparse
+import gzip
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from psycopg2 import sql
+
+from db import POOL_MAX, connection, set_timeout, with_retry
+
+# ============ CONFIGURACIÓN ============
+MARTS_SCHEMA = "public_analytics"
+STAGING_SCHEMA = "public_staging"
+
+EXPORTS = [
+    (MARTS_SCHEMA, "top_skills_report"),
+    (MARTS_SCHEMA, "trends_interests_values"),
+    (MARTS_SCHEMA, "experience_demographics"),
+    (MARTS_SCHEMA, "engagement_interview_funnel"),
+    (STAGING_SCHEMA, "stg_user_skills"),
+    (STAGING_SCHEMA, "stg_user_interests"),
+    (STAGING_SCHEMA, "stg_user_values"),
+    (STAGING_SCHEMA, "stg_interviews"),
+    (STAGING_SCHEMA, "stg_work_experience"),
+]
+
+FORMATS = ("csv", "parquet")
+DEFAULT_WORKERS = 4
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+
+GZIP_LEVEL = 6
+PARQUET_COMPRESSION = "zstd"
+CHUNK_BYTES = 8 << 20      # bloque CSV que pyarrow convierte en cada row group
+
+# OID de tipo Postgres -> nombre de tipo pyarrow (el resto se exporta como texto)
+NUMERIC_OID = 1700         # decimal con la precisión/escala de la columna, ver _arrow_type
+ARROW_TYPES = {
+    16: "bool_",
+    20: "int64", 21: "int16", 23: "int32",
+    700: "float32", 701: "float64",
+    1082: "date32",
+    1114: "timestamp_us", 1184: "timestamp_us_utc",
+}
+
+
+# ============ COPY ============
+def _copy_sql(conn, schema, table):
+    # Identificadores citados; HEADER para que los archivos lleven nombres de columna
+    return sql.SQL("COPY (SELECT * FROM {}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(
+        sql.Identifier(schema, table)).as_string(conn)
+
+
+def _prepare(conn, timeout):
+    """Formatos de texto estables para el CSV: fechas ISO y timestamps en UTC"""
+    with conn.cursor() as cur:
+        set_timeout(cur, timeout)
+        cur.execute("SET LOCAL datestyle = 'ISO'")
+        cur.execute("SET LOCAL timezone = 'UTC'")
+
+
+def _copy_to_csv(conn, schema, table, path):
+    with gzip.open(path, "wb", compresslevel=GZIP_LEVEL) as f:
+        with conn.cursor() as cur:
+            cur.copy_expert(_copy_sql(conn, schema, table), f)
+            return cur.rowcount
+
+
+def _arrow_type(pa, column):
+    """Tipo pyarrow para una columna de cursor.description"""
+    if column.type_code == NUMERIC_OID:
+        # numeric(p, s) -> decimal128 exacto. Sin typmod (precisión libre) o con más de
+        # 38 dígitos queda como texto: el lector CSV de pyarrow no convierte a decimal256
+        precision, scale = column.precision, column.scale
+        if precision is None or scale is None or not 0 <= scale <= precision <= 38:
+            return pa.string()
+        return pa.decimal128(precision, scale)
+    name = ARROW_TYPES.get(column.type_code)
+    if name == "timestamp_us":
+        return pa.timestamp("us")
+    if name == "timestamp_us_utc":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, name)() if name else pa.string()
+
+
+def _copy_to_parquet(conn, schema, table, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("El formato parquet requiere pyarrow: pip install pyarrow")
+
+    # Tipos desde el catálogo: la inferencia por bloque de pyarrow podría cambiar a mitad de tabla
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT * FROM {} LIMIT 0").format(sql.Identifier(schema, table)))
+        column_types = {d.name: _arrow_type(pa, d) for d in cur.description}
+
+    # COPY escribe en un pipe desde otro hilo; pyarrow lee el otro extremo por bloques
+    read_fd, write_fd = os.pipe()
+    reader, writer = os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "wb")
+    produced = {}
+
+    def produce():
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(_copy_sql(conn, schema, table), writer)
+                produced["rows"] = cur.rowcount
+        except Exception as e:
+            produced["error"] = e
+        finally:
+            try:
+                writer.close()
+            except OSError:
+                pass    # lector cerrado: el error real es el de pyarrow
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    failure = None
+    try:
+        batches = pa_csv.open_csv(
+            reader,
+            read_options=pa_csv.ReadOptions(block_size=CHUNK_BYTES),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                # COPY csv: NULL es un campo vacío sin comillas, "" es texto vacío
+                null_values=[""], strings_can_be_null=True, quoted_strings_can_be_null=False,
+                true_values=["t"], false_values=["f"]))
+        with pq.ParquetWriter(path, batches.schema, compression=PARQUET_COMPRESSION) as out:
+            for batch in batches:
+                out.write_batch(batch)
+    except Exception as e:
+        failure = e
+    finally:
+        # Si pyarrow falló, cerrar el pipe desbloquea al hilo del COPY
+        reader.close()
+        thread.join()
+    # Un COPY fallido deja a pyarrow un CSV vacío o truncado: su error es la causa real
+    if "error" in produced:
+        raise produced["error"] from failure
+    if failure is not None:
+        raise failure
+    return produced["rows"]
+
+
+# ============ EXPORTACIÓN ============
+def export_table(schema, table, fmt, output_dir, timeout=None):
+    """Vuelca una tabla a `output_dir`; devuelve {"table", "path", "rows", "bytes", "seconds"}"""
+    ext = ".csv.gz" if fmt == "csv" else ".parquet"
+    path = os.path.join(output_dir, f"{schema}.{table}{ext}")
+    tmp_path = path + ".tmp"
+    copy = _copy_to_csv if fmt == "csv" else _copy_to_parquet
+
+    def attempt():
+        with connection() as conn:
+            _prepare(conn, timeout)
+            return copy(conn, schema, table, tmp_path)
+
+    start = time.perf_counter()
+    try:
+        # Se reescribe el archivo temporal completo en cada intento
+        rows = with_retry(attempt)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {"table": f"{schema}.{table}", "path": path, "rows": rows,
+            "bytes": os.path.getsize(path), "seconds": round(time.perf_counter() - start, 2)}
+
+
+def export_all(exports=EXPORTS, fmt="csv", output_dir=None, workers=DEFAULT_WORKERS, timeout=None):
+    """Exporta varias tablas en paralelo; devuelve resultados (o excepciones) en el orden dado"""
+    output_dir = output_dir or os.path.join(OUTPUT_DIR, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, POOL_MAX, len(exports)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(export_table, schema, table, fmt, output_dir, timeout) for schema, table in exports]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+    return output_dir, results
+
+
+def _select(names):
+    """Filtra EXPORTS por nombre de tabla (con o sin esquema)"""
+    if not names:
+        return EXPORTS
+    selected = [(s, t) for s, t in EXPORTS if t in names or f"{s}.{t}" in names]
+    unknown = set(names) - {t for _, t in selected} - {f"{s}.{t}" for s, t in selected}
+    if unknown:
+        raise SystemExit(f"Tablas desconocidas: {', '.join(sorted(unknown))}")
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta marts y vistas staging con COPY")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="csv", help="csv (gzip) o parquet (zstd)")
+    parser.add_argument("--tables", nargs="+", help="Tablas a exportar (por defecto: todas)")
+    parser.add_argument("--output-dir", "-o", help="Directorio destino (por defecto: exports/<fecha>)")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help="Tablas en paralelo")
+    parser.add_argument("--timeout", type=float, default=None, help="statement_timeout por tabla, en segundos")
+    args = parser.parse_args()
+
+    exports = _select(args.tables)
+    print(f"\n📦 Exportando a {args.format}...\n")
+    start = time.perf_counter()
+    output_dir, results = export_all(exports, args.format, args.output_dir, args.workers, args.timeout)
+
+    failed = 0
+    for (schema, table), result in zip(exports, results):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"- {schema}.{table}: Error: {result}")
+        else:
+            print(f"- {result['table']}: {result['rows']} filas, {result['bytes'] / 1024:.1f} KB, {result['seconds']}s")
+
+    print(f"\n{len(results) - failed}/{len(results)} tablas en {output_dir} ({time.perf_counter() - start:.1f}s)")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,20 @@
 
-import os
-import psycopg2
-
-def get_connection():
-    return psycopg2.connect(
-        host="aws-0-us-west-2.pooler.supabase.com",
-        database="postgres",
-        user="postgres.fytyfeapxgswxkecneom",
-        password=os.environ.get("DB_PASSWORD"),
-        port=6543
-    )
+from db import fetchall
 
 def main():
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
         tables = ['interviews', 'work_experience']
         
         for table in tables:
             print(f"\n🔍 Columnas de '{table}':\n")
-            cur.execute(f"""
+            rows = fetchall("""
                 SELECT column_name, data_type 
                 FROM information_schema.columns 
-                WHERE table_name = '{table}' 
+                WHERE table_name = %s 
                 ORDER BY ordinal_position;
-            """)
-            rows = cur.fetchall()
+            """, (table,))
             for row in rows:
                 print(f"- {row[0]} ({row[1]})")
-            
-        cur.close()
-        conn.close()
         
     except Exception as e:
         print(f"Error: {e}")
@@ -1,22 +1,42 @@
 
-import os
-import psycopg2
+import argparse
+import sys
+
+from db import fetch_concurrently, fetchall
 from prettytable import PrettyTable
+from result_cache import cached_fetchall
+from stream_results import FORMATS, stream_query
+
+# Segundos máximos por consulta (statement_timeout en el servidor)
+QUERY_TIMEOUT = 30
+
+# (título, consulta, encabezados) en el orden en que se imprimen
+REPORTS = [
+    # 1. Habilidades (Ya visto)
+    # ("Top Habilidades",
+    #     "SELECT skill, total_users, popularity_percent FROM public_analytics.top_skills_report LIMIT 5",
+    #     ['Habilidad', 'Usuarios', '%']),
+
+    # 2. Intereses y Valores
+    ("Top Intereses y Valores (Psicografía)",
+        "SELECT type, name, count FROM public_analytics.trends_interests_values LIMIT 10",
+        ['Tipo', 'Nombre', 'Usuarios']),
+
+    # 3. Demografía de Experiencia
+    ("Nivel de Seniority (basado en CVs)",
+        "SELECT seniority_level, user_count, round(avg_roles, 1) FROM public_analytics.experience_demographics",
+        ['Nivel', 'Usuarios', 'Prom. Roles']),
 
-def get_connection():
-    return psycopg2.connect(
-        host="aws-0-us-west-2.pooler.supabase.com",
-        database="postgres",
-        user="postgres.fytyfeapxgswxkecneom",
-        password=os.environ.get("DB_PASSWORD"),
-        port=6543
-    )
+    # 4. Funnel de Entrevistas
+    ("Embudo de Entrevistas",
+        "SELECT status, total_interviews, active_users FROM public_analytics.engagement_interview_funnel",
+        ['Estado', 'Entrevistas', 'Usuarios Activos']),
+]
 
-def print_table(cur, title, query, headers):
+def print_table(title, future, headers):
     print(f"\n📊 {title}\n")
     try:
-        cur.execute(query)
-        rows = cur.fetchall()
+        rows = future.result()
         if not rows:
             print("No hay datos disponibles.")
             return
@@ -28,33 +48,36 @@ def print_table(cur, title, query, headers):
     except Exception as e:
         print(f"Error consultando {title}: {e}")
 
+def stream_reports(fmt):
+    # Streaming: una consulta tras otra, cada una con su cursor del servidor.
+    # En csv/jsonl stdout lleva sólo datos: títulos y errores van a stderr
+    log = sys.stdout if fmt == "aligned" else sys.stderr
+    for title, query, headers in REPORTS:
+        sys.stdout.flush()
+        print(f"\n# {title}\n", file=log)
+        try:
+            stream_query(query, fmt, headers=headers, timeout=QUERY_TIMEOUT)
+        except Exception as e:
+            sys.stdout.flush()
+            print(f"Error consultando {title}: {e}", file=sys.stderr)
+
 def main():
+    parser = argparse.ArgumentParser(description="Reportes avanzados (dbt)")
+    parser.add_argument("--format", "-f", choices=("table",) + FORMATS, default="table",
+                        help="table: consultas en paralelo y PrettyTable; csv/jsonl/aligned: streaming")
+    parser.add_argument("--no-cache", action="store_true", help="Consultar la base aunque haya resultados en caché")
+    args = parser.parse_args()
+
+    if args.format != "table":
+        stream_reports(args.format)
+        return
+
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        # 1. Habilidades (Ya visto)
-        # print_table(cur, "Top Habilidades", 
-        #     "SELECT skill, total_users, popularity_percent FROM public_analytics.top_skills_report LIMIT 5",
-        #     ['Habilidad', 'Usuarios', '%'])
-
-        # 2. Intereses y Valores
-        print_table(cur, "Top Intereses y Valores (Psicografía)", 
-            "SELECT type, name, count FROM public_analytics.trends_interests_values LIMIT 10",
-            ['Tipo', 'Nombre', 'Usuarios'])
-
-        # 3. Demografía de Experiencia
-        print_table(cur, "Nivel de Seniority (basado en CVs)", 
-            "SELECT seniority_level, user_count, round(avg_roles, 1) FROM public_analytics.experience_demographics",
-            ['Nivel', 'Usuarios', 'Prom. Roles'])
-
-        # 4. Funnel de Entrevistas
-        print_table(cur, "Embudo de Entrevistas", 
-            "SELECT status, total_interviews, active_users FROM public_analytics.engagement_interview_funnel",
-            ['Estado', 'Entrevistas', 'Usuarios Activos'])
-        
-        cur.close()
-        conn.close()
+        # Todas las consultas corren a la vez; se imprimen en el orden de REPORTS
+        futures = fetch_concurrently([query for _, query, _ in REPORTS], timeout=QUERY_TIMEOUT,
+                                     fetch=fetchall if args.no_cache else cached_fetchall)
+        for (title, _, headers), future in zip(REPORTS, futures):
+            print_table(title, future, headers)
         
     except Exception as e:
         print(f"Error general: {e}")
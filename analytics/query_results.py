@@ -1,26 +1,32 @@
 
-import os
-import psycopg2
+import argparse
+import sys
+
+from db import fetchall
 from prettytable import PrettyTable
+from result_cache import cached_fetchall
+from stream_results import FORMATS, stream_query
 
-def get_connection():
-    return psycopg2.connect(
-        host="aws-0-us-west-2.pooler.supabase.com",
-        database="postgres",
-        user="postgres.fytyfeapxgswxkecneom",
-        password=os.environ.get("DB_PASSWORD"),
-        port=6543
-    )
+QUERY = "SELECT skill, total_users, popularity_percent FROM public_analytics.top_skills_report ORDER BY total_users DESC"
 
 def main():
+    parser = argparse.ArgumentParser(description="Top habilidades (dbt)")
+    parser.add_argument("--format", "-f", choices=("table",) + FORMATS, default="table",
+                        help="table: PrettyTable en memoria; csv/jsonl/aligned: streaming con cursor del servidor")
+    parser.add_argument("--no-cache", action="store_true", help="Consultar la base aunque haya resultado en caché")
+    args = parser.parse_args()
+
+    if args.format != "table":
+        try:
+            stream_query(QUERY, args.format)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+        return
+
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
         print("\n📊 Top 20 Habilidades (Generado por dbt)\n")
         
-        cur.execute("SELECT skill, total_users, popularity_percent FROM public_analytics.top_skills_report ORDER BY total_users DESC")
-        rows = cur.fetchall()
+        rows = fetchall(QUERY) if args.no_cache else cached_fetchall(QUERY)
         
         t = PrettyTable(['Habilidad', 'Usuarios', '% Popularidad'])
         for row in rows:
@@ -28,9 +34,6 @@ def main():
             
         print(t)
         
-        cur.close()
-        conn.close()
-        
     except Exception as e:
         print(f"Error: {e}")
 
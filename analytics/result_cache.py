@@ -0,0 +1,237 @@
+
+"""
+Caché local (SQLite) de resultados de consultas sobre los marts.
+
+Uso:
+    from result_cache import cached_fetchall
+    rows = cached_fetchall("SELECT ... FROM public_analytics.top_skills_report")
+
+    python result_cache.py stats        # entradas, aciertos, tamaño, token actual
+    python result_cache.py prune        # borra entradas de tokens anteriores
+    python result_cache.py clear        # vacía la caché
+
+La clave es el SQL (más sus parámetros) y un token de frescura: un hash
+del OID y los contadores de escritura de las tablas del mart, leído del
+catálogo con una consulta barata. Cada `dbt run` recrea las tablas, así que
+el token cambia con cualquier reconstrucción, se haga desde donde se haga;
+mientras tanto repetir un reporte se responde desde disco sin ejecutar sus
+consultas. target/run_results.json no sirve de token: sólo refleja los
+`dbt run` de esta máquina (y target/ está versionado en el repositorio).
+El token y la hora en que se consultó se guardan en la tabla meta de la
+misma caché, así que cada proceso lo reutiliza hasta que pasan TOKEN_TTL
+segundos (ANALYTICS_TOKEN_TTL) o cambia run_results.json.
+
+Las vistas stg_* (esquema public_staging) leen tablas vivas de la
+aplicación: una consulta que las nombre va directa a la base, sin caché.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+
+from db import fetchall
+
+# ============ CONFIGURACIÓN ============
+ANALYTICS_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.environ.get("ANALYTICS_CACHE", os.path.join(ANALYTICS_DIR, ".cache", "results.sqlite"))
+RUN_RESULTS = os.path.join(os.environ.get("DBT_TARGET_PATH", os.path.join(ANALYTICS_DIR, "target")), "run_results.json")
+MARTS_SCHEMA = "public_analytics"
+TOKEN_TTL = float(os.environ.get("ANALYTICS_TOKEN_TTL", 60))  # segundos entre consultas al catálogo
+LIVE_RELATIONS = re.compile(r"\bstg_|\bpublic_staging\b", re.IGNORECASE)  # vistas sobre tablas vivas
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key      TEXT PRIMARY KEY,
+    query    TEXT NOT NULL,
+    token    TEXT NOT NULL,
+    created  REAL NOT NULL,
+    last_hit REAL,
+    hits     INTEGER NOT NULL DEFAULT 0,
+    rows     BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL,
+    mtime   INTEGER,
+    checked REAL NOT NULL
+);
+"""
+
+# Aciertos / fallos / consultas sin caché de este proceso (los acumulados están en la tabla)
+SESSION = {"hits": 0, "misses": 0, "live": 0}
+_lock = threading.Lock()
+_token = {}
+
+
+# ============ TOKEN DE FRESCURA ============
+def catalog_token(schema=MARTS_SCHEMA):
+    """Hash del OID y los contadores de escritura de cada tabla del esquema.
+
+    dbt materializa los marts como tabla nueva + rename, así que cada
+    reconstrucción cambia el OID; los contadores cubren escrituras directas.
+    """
+    rows = fetchall("""
+        SELECT c.oid, c.relname, coalesce(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = %s AND c.relkind IN ('r', 'm', 'p')
+        ORDER BY c.relname;
+    """, (schema,))
+    return "catalog:" + hashlib.sha256(repr(rows).encode()).hexdigest()[:16]
+
+
+def _token_valid(token, mtime, now):
+    return token is not None and token["mtime"] == mtime and 0 <= now - token["checked"] < TOKEN_TTL
+
+
+def freshness_token():
+    """Token actual (catalog_token); se consulta de nuevo tras TOKEN_TTL segundos o si run_results.json cambia
+
+    El valor vigente se comparte entre procesos a través de la tabla meta.
+    """
+    try:
+        # Un `dbt run` local reescribe run_results.json: no hace falta esperar al TTL
+        mtime = os.stat(RUN_RESULTS).st_mtime_ns
+    except OSError:
+        mtime = None
+    now = time.time()
+    with _lock:
+        if _token_valid(_token or None, mtime, now):
+            return _token["value"]
+
+        conn = _connect()
+        try:
+            row = conn.execute("SELECT value, mtime, checked FROM meta WHERE key = 'token'").fetchone()
+            stored = dict(zip(("value", "mtime", "checked"), row)) if row else None
+            if not _token_valid(stored, mtime, now):
+                stored = {"value": catalog_token(), "mtime": mtime, "checked": now}
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value, mtime, checked) VALUES ('token', ?, ?, ?)",
+                                 (stored["value"], mtime, now))
+        finally:
+            conn.close()
+        _token.update(stored)
+        return _token["value"]
+
+
+# ============ ALMACENAMIENTO ============
+def _connect():
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    # Una conexión por operación: los reportes consultan desde varios hilos
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def cache_key(query, params, token):
+    payload = json.dumps([query, params, token], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_fetchall(query, params=None, timeout=None):
+    """db.fetchall() con caché en disco: mismo SQL y mismo token -> filas guardadas
+
+    Las consultas sobre stg_* / public_staging no se cachean: el token sólo
+    cubre los marts y esas vistas cambian con la aplicación.
+    """
+    if LIVE_RELATIONS.search(query):
+        with _lock:
+            SESSION["live"] += 1
+        return fetchall(query, params, timeout=timeout)
+
+    token = freshness_token()
+    key = cache_key(query, params, token)
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT rows FROM results WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            with conn:
+                conn.execute("UPDATE results SET hits = hits + 1, last_hit = ? WHERE key = ?", (time.time(), key))
+            with _lock:
+                SESSION["hits"] += 1
+            return pickle.loads(row[0])
+
+        with _lock:
+            SESSION["misses"] += 1
+        rows = fetchall(query, params, timeout=timeout)
+        with conn:
+            # pickle conserva Decimal, fechas, etc. tal como los devuelve psycopg2
+            conn.execute("INSERT OR REPLACE INTO results (key, query, token, created, rows) VALUES (?, ?, ?, ?, ?)",
+                         (key, query, token, time.time(), pickle.dumps(rows, pickle.HIGHEST_PROTOCOL)))
+        return rows
+    finally:
+        conn.close()
+
+
+# ============ ESTADÍSTICAS / INVALIDACIÓN ============
+def stats():
+    """Entradas, aciertos acumulados y de esta sesión, tamaño en disco y token actual"""
+    conn = _connect()
+    try:
+        entries, hits, size = conn.execute(
+            "SELECT count(*), coalesce(sum(hits), 0), coalesce(sum(length(rows)), 0) FROM results").fetchone()
+        tokens = conn.execute("SELECT token, count(*) FROM results GROUP BY token ORDER BY max(created) DESC").fetchall()
+    finally:
+        conn.close()
+    return {"path": CACHE_PATH, "entries": entries, "hits": hits, "bytes": size,
+            "tokens": dict(tokens), "session": dict(SESSION)}
+
+
+def prune(token=None):
+    """Borra las entradas de tokens distintos al actual; devuelve cuántas"""
+    token = token or freshness_token()
+    conn = _connect()
+    try:
+        with conn:
+            removed = conn.execute("DELETE FROM results WHERE token != ?", (token,)).rowcount
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return removed
+
+
+def clear():
+    """Vacía la caché (incluido el token guardado); devuelve cuántas entradas había"""
+    conn = _connect()
+    try:
+        with conn:
+            removed = conn.execute("DELETE FROM results").rowcount
+            conn.execute("DELETE FROM meta")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché local de resultados de analítica")
+    parser.add_argument("command", choices=("stats", "prune", "clear"))
+    args = parser.parse_args()
+
+    try:
+        if args.command == "stats":
+            info = stats()
+            print(f"\n🗄️  Caché: {info['path']}\n")
+            print(f"- Entradas: {info['entries']} ({info['bytes'] / 1024:.1f} KB)")
+            print(f"- Aciertos acumulados: {info['hits']}")
+            print(f"- Token actual: {freshness_token()}")
+            for token, count in info["tokens"].items():
+                print(f"  - {token}: {count} entradas")
+        elif args.command == "prune":
+            print(f"{prune()} entradas obsoletas eliminadas")
+        else:
+            print(f"{clear()} entradas eliminadas")
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+
+"""
+Salida en streaming de resultados grandes (CSV, JSONL o texto alineado).
+
+Uso:
+    python stream_results.py public_analytics.top_skills_report --format csv > skills.csv
+    python stream_results.py "SELECT * FROM public_analytics.stg_user_skills" --format jsonl
+
+Las filas se leen con un cursor del servidor (db.stream) y se escriben a
+medida que llegan, así la memoria se mantiene plana aunque se quite el
+LIMIT y se exporte un mart completo.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+
+from db import ITERSIZE, stream
+
+FORMATS = ("csv", "jsonl", "aligned")
+
+# Filas que "aligned" lee por adelantado para calcular el ancho de cada columna
+ALIGN_SAMPLE = 500
+
+
+def _columns(cur, headers):
+    if headers:
+        return list(headers)
+    return [d[0] for d in cur.description] if cur.description else []
+
+
+def write_csv(rows, columns, out):
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    writer.writerows(rows)
+
+
+def write_jsonl(rows, columns, out):
+    # default=str: Decimal, fechas, UUID... se escriben como texto
+    for row in rows:
+        out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n")
+
+
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+def write_aligned(rows, columns, out, sample=ALIGN_SAMPLE):
+    """Texto en columnas; los anchos salen de las primeras `sample` filas (las siguientes pueden desbordar)"""
+    head = [[_cell(v) for v in row] for row in itertools.islice(rows, sample)]
+    widths = [len(c) for c in columns]
+    for row in head:
+        widths = [max(w, len(v)) for w, v in zip(widths, row)]
+
+    def line(values):
+        return " | ".join(v.ljust(w) for v, w in zip(values, widths)).rstrip() + "\n"
+
+    out.write(line(columns))
+    out.write("-+-".join("-" * w for w in widths) + "\n")
+    for row in head:
+        out.write(line(row))
+    for row in rows:
+        out.write(line([_cell(v) for v in row]))
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "aligned": write_aligned}
+
+
+def write_rows(cur, fmt, out=sys.stdout, headers=None):
+    """Escribe las filas de un cursor en `fmt` sin cargarlas todas en memoria; devuelve cuántas"""
+    rows = iter(cur)
+    # Un named cursor sólo conoce sus columnas tras traer el primer lote
+    first = next(rows, None)
+    columns = _columns(cur, headers)
+    if first is not None:
+        rows = itertools.chain([first], rows)
+    count = itertools.count()
+    WRITERS[fmt]((row for row, _ in zip(rows, count)), columns, out)
+    return next(count)
+
+
+def stream_query(query, fmt, out=sys.stdout, headers=None, params=None, itersize=ITERSIZE, timeout=None):
+    """Ejecuta `query` con un cursor del servidor y escribe el resultado en streaming"""
+    with stream(query, params, itersize=itersize, timeout=timeout) as cur:
+        return write_rows(cur, fmt, out, headers)
+
+
+def _as_query(target):
+    """Acepta SQL o un nombre de tabla/vista (esquema.tabla)"""
+    if target.split(None, 1)[0].lower() in ("select", "with", "table", "values"):
+        return target
+    schema, _, table = target.rpartition(".")
+    # Identificadores entre comillas: el nombre no se interpreta como SQL
+    name = ".".join('"' + part.replace('"', '""') + '"' for part in (schema, table) if part)
+    return f"SELECT * FROM {name}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta una consulta o vista en streaming")
+    parser.add_argument("target", help="SQL o nombre de tabla/vista (p. ej. public_analytics.top_skills_report)")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="csv")
+    parser.add_argument("--itersize", type=int, default=ITERSIZE, help="Filas por lote del cursor del servidor")
+    parser.add_argument("--timeout", type=float, default=None, help="statement_timeout en segundos")
+    args = parser.parse_args()
+
+    try:
+        count = stream_query(_as_query(args.target), args.format, itersize=args.itersize, timeout=args.timeout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Salida cortada (p. ej. `| head`): no es un error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{count} filas", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
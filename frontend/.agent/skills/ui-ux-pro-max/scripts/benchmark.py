@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - reproducible timings for the search engine
+
+Usage: python benchmark.py [--scales 1,10,100,1000] [--iterations 200] [--output bench.json]
+       python benchmark.py --compare before.json after.json
+
+Covers BM25.fit, BM25.score, _search_csv, search, search_stack, detect_domain
+and generate_design_system on the bundled CSVs plus synthetic corpora built
+by scaling a bundled CSV (rows resampled from its own vocabulary, fixed seed).
+Reports throughput, p50/p99 latency and peak traced memory as JSON.
+Paths behind RESULT_CACHE or the tokenize_query LRU are reported twice: as
+called (mostly cache hits) and as "<name> (uncached)", with both caches
+cleared before every timed call.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import core
+from core import BM25, CSV_CONFIG, STACK_CONFIG, DATA_DIR, _search_csv, detect_domain, search, search_stack
+from design_system import generate_design_system
+
+# ============ CONFIGURATION ============
+DEFAULT_SCALES = [1, 10, 100, 1000]
+DEFAULT_ITERATIONS = 200
+SYNTHETIC_SOURCE = "ux"  # CSV_CONFIG domain used as the template for scaled corpora
+SEED = 42
+
+QUERIES = [
+    "SaaS dashboard", "fintech landing", "glassmorphism dark mode", "accessibility animation",
+    "elegant luxury serif", "beauty spa wellness service", "real-time chart trend",
+    "react memo rerender", "form input aria focus", "ecommerce luxury minimal"
+]
+
+
+# ============ MEASUREMENT ============
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def measure(name, corpus, docs, fn, iterations, setup=None):
+    """Time fn() `iterations` times, then trace one extra call for peak memory"""
+    timings = []
+    for i in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        "name": name,
+        "corpus": corpus,
+        "docs": docs,
+        "iterations": iterations,
+        "throughput_per_s": round(iterations / total, 2) if total else None,
+        "p50_ms": round(_percentile(timings, 50) * 1000, 4),
+        "p99_ms": round(_percentile(timings, 99) * 1000, 4),
+        "peak_mem_kb": round(peak / 1024, 1)
+    }
+
+
+def _clear_caches():
+    """measure() setup: the next call misses RESULT_CACHE and re-tokenizes its query"""
+    core.RESULT_CACHE.clear()
+    core.tokenize_query.cache_clear()
+
+
+def _iterations_for(docs, base):
+    """Fewer iterations for big corpora so a full run stays in minutes"""
+    return max(3, min(base, int(base * 1000 / max(docs, 1))))
+
+
+# ============ CORPORA ============
+def _synthetic_csv(rows, search_cols, scale, directory):
+    """Write `scale` x the template rows, each search column resampled from the template vocabulary"""
+    rng = random.Random(SEED + scale)
+    vocab = {col: [tok for row in rows for tok in str(row.get(col, "")).split()] or ["empty"] for col in search_cols}
+    path = Path(directory) / f"synthetic-x{scale}.csv"
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        for _ in range(scale):
+            for row in rows:
+                new_row = dict(row)
+                for col in search_cols:
+                    length = max(1, len(str(row.get(col, "")).split()))
+                    new_row[col] = " ".join(rng.choice(vocab[col]) for _ in range(length))
+                writer.writerow(new_row)
+    return path
+
+
+# ============ BENCHMARKS ============
+def bench_corpus(label, filepath, config, iterations, results):
+    """BM25.fit / BM25.score / _search_csv (warm and cold) on one CSV"""
+    rows = core._load_csv(filepath)
+    documents = [" ".join(str(row.get(col, "")) for col in config["search_cols"]) for row in rows]
+    n = len(documents)
+    its = _iterations_for(n, iterations)
+
+    results.append(measure("BM25.fit", label, n, lambda i: BM25().fit(documents), max(3, its // 10)))
+
+    bm25 = BM25()
+    bm25.fit(documents)
+    results.append(measure("BM25.score", label, n, lambda i: bm25.score(QUERIES[i % len(QUERIES)], core.MAX_RESULTS), its))
+    results.append(measure("BM25.score (uncached)", label, n,
+                           lambda i: bm25.score(QUERIES[i % len(QUERIES)], core.MAX_RESULTS), its, setup=_clear_caches))
+
+    search_cols, output_cols = config["search_cols"], config["output_cols"]
+    _search_csv(filepath, search_cols, output_cols, QUERIES[0], core.MAX_RESULTS)
+    results.append(measure("_search_csv", label, n,
+                           lambda i: _search_csv(filepath, search_cols, output_cols, QUERIES[i % len(QUERIES)], core.MAX_RESULTS),
+                           its))
+    results.append(measure("_search_csv (uncached)", label, n,
+                           lambda i: _search_csv(filepath, search_cols, output_cols, QUERIES[i % len(QUERIES)], core.MAX_RESULTS),
+                           its, setup=_clear_caches))
+    results.append(measure("_search_csv (cold, on-disk index)", label, n,
+                           lambda i: _search_csv(filepath, search_cols, output_cols, QUERIES[i % len(QUERIES)], core.MAX_RESULTS),
+                           max(3, its // 10), setup=lambda: (_clear_caches(), core.invalidate_cache(filepath))))
+
+
+def bench_api(iterations, results):
+    """search / search_stack / detect_domain / generate_design_system on the bundled data"""
+    docs = sum(len(core._load_csv(DATA_DIR / c["file"])) for c in CSV_CONFIG.values())
+    stacks = list(STACK_CONFIG)
+
+    for query in QUERIES:
+        search(query)
+    results.append(measure("search", "bundled", docs, lambda i: search(QUERIES[i % len(QUERIES)]), iterations))
+    results.append(measure("search (uncached)", "bundled", docs, lambda i: search(QUERIES[i % len(QUERIES)]),
+                           iterations, setup=_clear_caches))
+    for stack in stacks:
+        search_stack(QUERIES[0], stack)
+    results.append(measure("search_stack", "bundled", docs,
+                           lambda i: search_stack(QUERIES[i % len(QUERIES)], stacks[i % len(stacks)]), iterations))
+    results.append(measure("search_stack (uncached)", "bundled", docs,
+                           lambda i: search_stack(QUERIES[i % len(QUERIES)], stacks[i % len(stacks)]),
+                           iterations, setup=_clear_caches))
+    results.append(measure("detect_domain", "bundled", docs, lambda i: detect_domain(QUERIES[i % len(QUERIES)]), iterations))
+    generate_design_system(QUERIES[0])
+    results.append(measure("generate_design_system", "bundled", docs,
+                           lambda i: generate_design_system(QUERIES[i % len(QUERIES)]), max(3, iterations // 4)))
+    results.append(measure("generate_design_system (uncached)", "bundled", docs,
+                           lambda i: generate_design_system(QUERIES[i % len(QUERIES)]), max(3, iterations // 4),
+                           setup=_clear_caches))
+
+
+def run(scales, iterations):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep benchmark index artifacts out of the real data dir
+        core.INDEX_DIR = Path(tmp) / "index"
+
+        bench_api(iterations, results)
+        for domain, config in CSV_CONFIG.items():
+            bench_corpus(f"bundled:{domain}", DATA_DIR / config["file"], config, iterations, results)
+
+        template = CSV_CONFIG[SYNTHETIC_SOURCE]
+        rows = core._load_csv(DATA_DIR / template["file"])
+        for scale in scales:
+            if scale <= 1:
+                continue
+            path = _synthetic_csv(rows, template["search_cols"], scale, tmp)
+            bench_corpus(f"synthetic:{SYNTHETIC_SOURCE}-x{scale}", path, template, iterations, results)
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ============ COMPARISON ============
+def compare(before_path, after_path):
+    """Print p50 latency and speedup for benchmarks present in both reports"""
+    with open(before_path, 'r', encoding='utf-8') as f:
+        before = {(r["name"], r["corpus"]): r for r in json.load(f)["results"]}
+    with open(after_path, 'r', encoding='utf-8') as f:
+        after = json.load(f)["results"]
+
+    print(f"{'benchmark':<40} {'corpus':<28} {'p50 before':>11} {'p50 after':>11} {'speedup':>8}")
+    for r in after:
+        old = before.get((r["name"], r["corpus"]))
+        if not old:
+            continue
+        speedup = old["p50_ms"] / r["p50_ms"] if r["p50_ms"] else float("inf")
+        print(f"{r['name']:<40} {r['corpus']:<28} {old['p50_ms']:>11.4f} {r['p50_ms']:>11.4f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search benchmark")
+    parser.add_argument("--scales", type=str, default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Synthetic corpus scale factors (default: 1,10,100,1000)")
+    parser.add_argument("--iterations", "-n", type=int, default=DEFAULT_ITERATIONS, help="Iterations per benchmark on small corpora")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write JSON report to this file (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two JSON reports")
+
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scales": scales,
+            "iterations": args.iterations,
+            "seed": SEED
+        },
+        "results": run(scales, args.iterations)
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -5,19 +5,50 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import heapq
+import os
 import re
+import sys
+import time
+from _thread import allocate_lock  # threading.Lock without importing threading (only warm() starts threads)
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
+
+from tracing import span, traced
+
+# Optional vectorized backend, imported on first use so CLI startup stays cheap
+# (pure-Python BM25 is used when these are missing)
+np = None
+sparse = None
+_SPARSE_AVAILABLE = None
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
 MAX_RESULTS = 3
 
+# Prebuilt index artifacts (one memory-mapped binary file per CSV, patched or
+# rebuilt when the CSV changes)
+INDEX_DIR = Path(os.environ.get("UIPRO_INDEX_DIR", DATA_DIR / ".index"))
+INDEX_FORMAT_VERSION = 6
+
+# Cached data files are re-stat'ed at most this often (seconds)
+STAT_INTERVAL = float(os.environ.get("UIPRO_STAT_INTERVAL", "1.0"))
+
+# Ranked search()/search_stack() results kept per process (0 disables);
+# entries also expire after RESULT_CACHE_TTL seconds when it is > 0
+RESULT_CACHE_SIZE = int(os.environ.get("UIPRO_RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.environ.get("UIPRO_RESULT_CACHE_TTL", "0"))
+
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type", "AI Prompt Keywords"],
+        # BM25F field weights (columns not listed weigh 1.0)
+        "boosts": {"Style Category": 4.0, "Keywords": 2.0},
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity", "AI Prompt Keywords", "CSS/Technical Keywords", "Implementation Checklist", "Design System Variables"]
     },
     "color": {
@@ -92,135 +123,1421 @@ _STACK_COLS = {
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+# ============ TOKENIZER ============
+_NON_WORD = re.compile(r'[^\w\s]')
+QUERY_CACHE_SIZE = 4096
+
+
+def tokenize(text):
+    """Lowercase, split, remove punctuation, filter short words"""
+    return [w for w in _NON_WORD.sub(' ', str(text).lower()).split() if len(w) > 2]
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def tokenize_query(text):
+    """tokenize() for query strings, LRU-cached; returns an immutable tuple"""
+    return tuple(tokenize(text))
+
+
+class Vocabulary:
+    """Interned term <-> integer id mapping"""
+
+    def __init__(self, terms=()):
+        self.terms = []
+        self.ids = {}
+        for term in terms:
+            self.add(term)
+
+    def add(self, term):
+        """Return the id of term, assigning the next id if it is new"""
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term = sys.intern(term)
+            term_id = len(self.terms)
+            self.ids[term] = term_id
+            self.terms.append(term)
+        return term_id
+
+    def get(self, term):
+        """Id of term, or None if it never occurs in the corpus"""
+        return self.ids.get(term)
+
+    def copy(self):
+        return Vocabulary(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over labelled keyword groups, built once.
+
+    One pass over the (lower-cased) text finds every keyword it contains as a
+    substring, i.e. exactly the keywords for which `kw in text.lower()` holds.
+    """
+
+    def __init__(self, groups):
+        """groups: {label: [keywords]}; label order is kept for counts() and first()"""
+        self.labels = list(groups)
+        self.keywords = []  # keyword id -> (keyword, label)
+        goto, out = [{}], [[]]
+        for label, keywords in groups.items():
+            for keyword in keywords:
+                state = 0
+                for ch in keyword.lower():
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = goto[state][ch] = len(goto)
+                        goto.append({})
+                        out.append([])
+                    state = nxt
+                out[state].append(len(self.keywords))
+                self.keywords.append((keyword, label))
+
+        # Failure links, breadth first; each state also reports its fallbacks' keywords
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                back = fail[state]
+                while back and ch not in goto[back]:
+                    back = fail[back]
+                fail[nxt] = goto[back].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, [tuple(o) for o in out]
+
+    def find(self, text):
+        """Ids (into self.keywords) of the distinct keywords occurring in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(out[0])
+        state = 0
+        for ch in str(text).lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def counts(self, text):
+        """{label: number of its keywords occurring in text} for every label, in order"""
+        counts = dict.fromkeys(self.labels, 0)
+        for keyword_id in self.find(text):
+            counts[self.keywords[keyword_id][1]] += 1
+        return counts
+
+    def first(self, text):
+        """First label (in group order) with a keyword in text, or None"""
+        hit = {self.keywords[keyword_id][1] for keyword_id in self.find(text)}
+        return next((label for label in self.labels if label in hit), None)
+
+
 # ============ BM25 IMPLEMENTATION ============
-class BM25:
-    """BM25 ranking algorithm for text search"""
+def has_sparse():
+    """Import NumPy/SciPy on first call; False when either is missing"""
+    global np, sparse, _SPARSE_AVAILABLE
+    if _SPARSE_AVAILABLE is None:
+        try:
+            import numpy as np
+            from scipy import sparse
+            _SPARSE_AVAILABLE = True
+        except ImportError:
+            _SPARSE_AVAILABLE = False
+    return _SPARSE_AVAILABLE
+
+
+class BM25Scorer:
+    """Read-only BM25 scoring over a fitted index.
+
+    Terms are mapped to integer ids through a Vocabulary and each term's
+    postings are parallel doc-id / term-frequency columns; idf and doc_freqs
+    are indexed by term id. Subclasses build (and possibly patch) these
+    structures; patchable ones provide copy() returning a BM25.
+    """
+
+    TF_TYPECODE = 'I'
+    patchable = False
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_lengths = []
+        self.vocab = Vocabulary()
+        self.doc_lengths = array('I')
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.idf = array('d')
+        self.doc_freqs = array('I')
+        self.postings = []
+        self.norms = array('d')
         self.N = 0
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return tokenize(text)
+
+    def _compute_stats(self):
+        """Derive doc_freqs, idf and length norms from postings and doc lengths"""
+        self.doc_freqs = array('I', [len(doc_ids) for doc_ids, _ in self.postings])
+        self._refresh_weights()
+
+    def _refresh_weights(self):
+        """Recompute idf (depends on N) and length norms (depend on avgdl)"""
+        self.avgdl = sum(self.doc_lengths) / self.N if self.N else 0
+        self.idf = array('d', [log((self.N - freq + 0.5) / (freq + 0.5) + 1) for freq in self.doc_freqs])
+        # Length-normalization part of each document's denominator
+        if not self.avgdl:
+            # No document has an indexed token, so nothing can match; avoid 0 / 0
+            self.norms = array('d', [self.k1]) * self.N
+            return
+        self.norms = array('d', [self.k1 * (1 - self.b + self.b * doc_len / self.avgdl) for doc_len in self.doc_lengths])
+
+    def score(self, query, max_results=None):
+        """Score documents containing any query term; returns (idx, score) best first"""
+        return self.score_tokens(tokenize_query(query), max_results)
+
+    def score_tokens(self, query_tokens, max_results=None):
+        """Score an already tokenized query; returns (idx, score) best first.
+
+        Only postings of the query terms are visited. With max_results, a heap keeps
+        the top-k; ties keep corpus order like a stable sort would.
+        """
+        with span("bm25.score", "score"):
+            scores = self.scores(query_tokens)
+        with span("bm25.rank", "sort", candidates=len(scores)):
+            if max_results is not None:
+                return heapq.nlargest(max_results, scores.items(), key=lambda x: (x[1], -x[0]))
+            return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def scores(self, query_tokens):
+        """Unranked {idx: score} for every document containing a query term"""
+        scores = defaultdict(float)
+        k1_plus_1 = self.k1 + 1
+        norms = self.norms
+        term_ids = self.vocab.ids
+
+        for token in query_tokens:
+            term_id = term_ids.get(token)
+            if term_id is None:
+                continue
+            idf = self.idf[term_id]
+            doc_ids, tfs = self.postings[term_id]
+            for idx, tf in zip(doc_ids, tfs):
+                scores[idx] += idf * (tf * k1_plus_1) / (tf + norms[idx])
+        return scores
+
+    def score_batch(self, queries, max_results=None):
+        """Score many queries; returns one ranked (idx, score) list per query"""
+        return [self.score(query, max_results) for query in queries]
+
+
+class BM25(BM25Scorer):
+    """BM25 ranking algorithm for text search.
+
+    The corpus is kept as array('I') token-id sequences and each term's
+    postings as parallel array('I') doc-id / term-frequency columns.
+
+    add_documents/remove_documents patch a fitted index in place. They replace
+    the postings of the terms they touch instead of mutating them, so a copy()
+    can be patched while the original keeps serving queries.
+    """
+
+    patchable = True
+
+    def __init__(self, k1=1.5, b=0.75):
+        super().__init__(k1, b)
+        self.corpus = []
 
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        """Build BM25 index (postings lists + length norms) from documents"""
+        with span("bm25.fit", "index", docs=len(documents)):
+            ids, add = self.vocab.ids, self.vocab.add
+            self.corpus = [array('I', [ids[w] if w in ids else add(w) for w in tokenize(doc)]) for doc in documents]
+            self._index_corpus()
+
+    @classmethod
+    def merge(cls, parts, k1=1.5, b=0.75):
+        """One index over the concatenated corpora of fitted indexes, without re-tokenizing.
+
+        Documents keep their order: part 0's documents first, then part 1's, ...
+        """
+        bm25 = cls(k1, b)
+        add = bm25.vocab.add
+        for part in parts:
+            remap = [add(term) for term in part.vocab.terms]
+            bm25.corpus.extend(array('I', [remap[term_id] for term_id in doc]) for doc in part.corpus)
+        bm25._index_corpus()
+        return bm25
+
+    def _index_corpus(self):
+        """Build postings and stats from self.corpus"""
         self.N = len(self.corpus)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
+        self.doc_lengths = array('I', [len(doc) for doc in self.corpus])
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+        self.postings = [(array('I'), array('I')) for _ in range(len(self.vocab))]
+        postings = self.postings
+        for idx, doc in enumerate(self.corpus):
+            for term_id, tf in Counter(doc).items():
+                doc_ids, tfs = postings[term_id]
+                doc_ids.append(idx)
+                tfs.append(tf)
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        self._compute_stats()
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+    def add_documents(self, documents):
+        """Append documents after the current corpus; returns their doc ids.
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+        Tokenizing and posting work is proportional to the new documents; idf and
+        norms (which depend on N and avgdl) are refreshed in one pass.
+        """
+        ids, add = self.vocab.ids, self.vocab.add
+        postings, doc_freqs = self.postings, self.doc_freqs
+        start = self.N
+        touched = set()
+        for idx, doc in enumerate(documents, start):
+            tokens = array('I', [ids[w] if w in ids else add(w) for w in tokenize(doc)])
+            self.corpus.append(tokens)
+            self.doc_lengths.append(len(tokens))
+            while len(postings) < len(self.vocab):
+                postings.append((array('I'), array('I')))
+                doc_freqs.append(0)
+            for term_id, tf in Counter(tokens).items():
+                if term_id not in touched:
+                    touched.add(term_id)
+                    doc_ids, tfs = postings[term_id]
+                    postings[term_id] = (array('I', doc_ids), array('I', tfs))
+                doc_ids, tfs = postings[term_id]
+                doc_ids.append(idx)
+                tfs.append(tf)
+                doc_freqs[term_id] += 1
+
+        self.N = len(self.corpus)
+        self._refresh_weights()
+        return list(range(start, self.N))
+
+    def remove_documents(self, doc_ids):
+        """Remove documents by id; later documents shift down so ids stay dense and in corpus order.
+
+        Only postings entries at or after the first removed id are rewritten.
+        Terms left without postings stay in the vocabulary.
+        """
+        removed = sorted(set(doc_ids))
+        if not removed:
+            return
+        if removed[0] < 0 or removed[-1] >= self.N:
+            raise IndexError("document id out of range")
+        first, gone = removed[0], set(removed)
+
+        for idx in removed:
+            for term_id in set(self.corpus[idx]):
+                self.doc_freqs[term_id] -= 1
+
+        for term_id, (posted, tfs) in enumerate(self.postings):
+            start = bisect_left(posted, first)
+            if start == len(posted):
+                continue
+            new_ids, new_tfs = posted[:start], tfs[:start]
+            for idx, tf in zip(posted[start:], tfs[start:]):
+                if idx not in gone:
+                    new_ids.append(idx - bisect_left(removed, idx))
+                    new_tfs.append(tf)
+            self.postings[term_id] = (new_ids, new_tfs)
+
+        self.corpus = self.corpus[:first] + [doc for idx, doc in enumerate(self.corpus[first:], first) if idx not in gone]
+        self.doc_lengths = array('I', [len(doc) for doc in self.corpus])
+        self.N = len(self.corpus)
+        self._refresh_weights()
+
+    def copy(self):
+        """Copy that add_documents/remove_documents can patch without touching this index"""
+        clone = BM25(self.k1, self.b)
+        clone.vocab = self.vocab.copy()
+        clone.corpus = list(self.corpus)
+        clone.doc_lengths = array('I', self.doc_lengths)
+        clone.avgdl = self.avgdl
+        clone.idf = array('d', self.idf)
+        clone.doc_freqs = array('I', self.doc_freqs)
+        clone.postings = list(self.postings)
+        clone.norms = array('d', self.norms)
+        clone.N = self.N
+        return clone
+
+
+class BM25F(BM25Scorer):
+    """Field-weighted BM25: every search column is indexed as its own field.
+
+    A term's frequency in a document is the boosted sum of its per-field
+    frequencies, each normalized by that field's length:
+        tf~ = sum_f boost_f * tf_f / (1 - b + b * len_f / avglen_f)
+    and a document scores sum_t idf(t) * tf~ * (k1 + 1) / (tf~ + k1).
+    tf~ is precomputed into the postings at fit time and every norm is k1,
+    so scoring (including SparseBM25) runs the plain BM25 code unchanged.
+    Field length averages move whenever the corpus does, so these indexes
+    are rebuilt rather than patched.
+    """
+
+    TF_TYPECODE = 'd'
+
+    def __init__(self, k1=1.5, b=0.75, boosts=None):
+        super().__init__(k1, b)
+        self.boosts = list(boosts or [])
+
+    def fit(self, documents):
+        """Build the index from documents given as one text per field (in boosts order)"""
+        with span("bm25f.fit", "index", docs=len(documents)):
+            self._fit_fields(documents)
+
+    def _fit_fields(self, documents):
+        ids, add = self.vocab.ids, self.vocab.add
+        field_docs = [[[ids[w] if w in ids else add(w) for w in tokenize(text)] for text in fields] for fields in documents]
+        self.N = len(field_docs)
+        if self.N == 0:
+            return
+        self.doc_lengths = array('I', [sum(len(tokens) for tokens in fields) for fields in field_docs])
+
+        avg_lengths = [sum(len(fields[f]) for fields in field_docs) / self.N for f in range(len(self.boosts))]
+        self.postings = [(array('I'), array('d')) for _ in range(len(self.vocab))]
+        postings = self.postings
+        for idx, fields in enumerate(field_docs):
+            pseudo_tfs = defaultdict(float)
+            for tokens, boost, avg_length in zip(fields, self.boosts, avg_lengths):
+                if not tokens:
+                    continue
+                weight = boost / (1 - self.b + self.b * len(tokens) / avg_length)
+                for term_id in tokens:
+                    pseudo_tfs[term_id] += weight
+            for term_id, tf in pseudo_tfs.items():
+                doc_ids, tfs = postings[term_id]
+                doc_ids.append(idx)
+                tfs.append(tf)
 
+        self._compute_stats()
+
+    def _refresh_weights(self):
+        super()._refresh_weights()
+        # Length normalization is already inside the pseudo term frequencies
+        self.norms = array('d', [self.k1]) * self.N
+
+
+class SparseBM25(BM25):
+    """BM25 backed by a CSR doc x term matrix of precomputed BM25 weights (needs NumPy + SciPy).
+
+    A query is one sparse dot product; a batch of queries is one sparse
+    matrix product. Top-k uses a partial sort (np.partition). Matrix columns
+    are the Vocabulary term ids.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        if not has_sparse():
+            raise ImportError("SparseBM25 requires numpy and scipy")
+        super().__init__(k1, b)
+        self.matrix = None
+
+    def fit(self, documents):
+        """Build BM25 index and the weighted term-document matrix"""
+        super().fit(documents)
+        self._build_matrix()
+
+    def add_documents(self, documents):
+        doc_ids = super().add_documents(documents)
+        self._build_matrix()
+        return doc_ids
+
+    def remove_documents(self, doc_ids):
+        super().remove_documents(doc_ids)
+        self._build_matrix()
+
+    @classmethod
+    def from_bm25(cls, bm25):
+        """Vectorize an already fitted BM25 without re-tokenizing the corpus"""
+        sparse_bm25 = cls(bm25.k1, bm25.b)
+        sparse_bm25.__dict__.update({k: v for k, v in bm25.__dict__.items() if k != "matrix"})
+        sparse_bm25._build_matrix()
+        return sparse_bm25
+
+    def _build_matrix(self):
+        """Lay postings out as CSR rows = documents, columns = term ids"""
+        rows, cols, weights = [], [], []
+        k1_plus_1 = self.k1 + 1
+        for term_id, (doc_ids, tfs) in enumerate(self.postings):
+            idf = self.idf[term_id]
+            for idx, tf in zip(doc_ids, tfs):
+                rows.append(idx)
+                cols.append(term_id)
+                weights.append(idf * (tf * k1_plus_1) / (tf + self.norms[idx]))
+        self.matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(self.N, len(self.vocab)), dtype=np.float64)
+
+    def _query_matrix(self, token_lists):
+        """Term-count matrix (terms x queries); repeated query terms count once per occurrence"""
+        rows, cols = [], []
+        term_ids = self.vocab.ids
+        for q, query_tokens in enumerate(token_lists):
             for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+                term_id = term_ids.get(token)
+                if term_id is not None:
+                    rows.append(term_id)
+                    cols.append(q)
+        data = np.ones(len(rows), dtype=np.float64)
+        return sparse.csc_matrix((data, (rows, cols)), shape=(len(self.vocab), len(token_lists)))
+
+    @staticmethod
+    def _rank(doc_ids, scores, max_results):
+        """Order positive scores best first (ties by doc id), keeping at most max_results"""
+        mask = scores > 0
+        doc_ids, scores = doc_ids[mask], scores[mask]
+        if max_results is not None and len(scores) > max_results:
+            if max_results <= 0:
+                return []
+            # Keep everything tied with the k-th best so tie-breaking stays exact
+            kth = np.partition(scores, len(scores) - max_results)[len(scores) - max_results]
+            keep = scores >= kth
+            doc_ids, scores = doc_ids[keep], scores[keep]
+        order = np.lexsort((doc_ids, -scores))
+        if max_results is not None:
+            order = order[:max_results]
+        return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+    def score_tokens(self, query_tokens, max_results=None):
+        """Score one tokenized query with a sparse dot product"""
+        return self.score_token_batch([query_tokens], max_results)[0]
+
+    def score_batch(self, queries, max_results=None):
+        """Score all queries in one sparse matrix product"""
+        return self.score_token_batch([tokenize_query(query) for query in queries], max_results)
+
+    def score_token_batch(self, token_lists, max_results=None):
+        """Score tokenized queries in one sparse matrix product"""
+        if self.N == 0 or self.matrix is None:
+            return [[] for _ in token_lists]
+        with span("sparse.score", "score", queries=len(token_lists)):
+            result = (self.matrix @ self._query_matrix(token_lists)).tocsc()
+        ranked = []
+        with span("sparse.rank", "sort"):
+            for q in range(len(token_lists)):
+                start, end = result.indptr[q], result.indptr[q + 1]
+                ranked.append(self._rank(result.indices[start:end], result.data[start:end], max_results))
+        return ranked
+
+
+# ============ INDEX STORE ============
+class ColumnStore:
+    """Column-oriented storage for the output columns of a CSV.
+
+    Each column is a table of its distinct values plus an array('I') of
+    per-row codes into that table, so repeated values (Category, Severity,
+    Platform, ...) are stored once and no per-row dicts stay resident.
+    """
+
+    __slots__ = ("columns", "tables", "codes", "_pos", "_lookup")
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.tables = [[] for _ in self.columns]
+        self.codes = [array('I') for _ in self.columns]
+        self._pos = {col: i for i, col in enumerate(self.columns)}
+        self._lookup = None
+
+    def append(self, values):
+        """Add one row given its values in column order"""
+        if self._lookup is None:
+            self._lookup = [{value: code for code, value in enumerate(table)} for table in self.tables]
+        for value, table, codes, lookup in zip(values, self.tables, self.codes, self._lookup):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(table)
+                table.append(value)
+            codes.append(code)
+
+    def seal(self):
+        """Drop the build-time value lookup once all rows are appended"""
+        self._lookup = None
+
+    def truncate(self, n):
+        """Drop every row from n on (distinct-value tables are left as they are)"""
+        for codes in self.codes:
+            del codes[n:]
+
+    def copy(self):
+        """Copy that append/truncate can change without touching this store"""
+        store = ColumnStore(self.columns)
+        store.tables = [list(table) for table in self.tables]
+        store.codes = [array('I', codes) for codes in self.codes]
+        return store
+
+    def project(self, idx, output_cols):
+        """Materialize one row as a dict of output_cols (columns not in the store are skipped)"""
+        pos_of = self._pos
+        return {col: self.tables[pos_of[col]][self.codes[pos_of[col]][idx]] for col in output_cols if col in pos_of}
+
+    def __len__(self):
+        return len(self.codes[0]) if self.codes else 0
+
+
+class SearchIndex:
+    """Fitted BM25 index plus a ColumnStore of the output columns of every row it covers.
+
+    header and fingerprints (one 64-bit digest per CSV row) let an edited CSV
+    be patched into the index instead of rebuilt (see _patch_index).
+    """
+
+    def __init__(self, bm25, store, source=None, header=None, fingerprints=None):
+        self.bm25 = bm25
+        self.store = store
+        self.source = source or {}
+        self.header = header or []
+        self.fingerprints = fingerprints if fingerprints is not None else array('Q')
+        self._sparse = None
+
+    @property
+    def columns(self):
+        return self.store.columns
+
+    def vectorized(self):
+        """SparseBM25 view of this index when NumPy/SciPy are available, else the pure-Python BM25"""
+        if not has_sparse():
+            return self.bm25
+        if self._sparse is None:
+            self._sparse = SparseBM25.from_bm25(self.bm25)
+        return self._sparse
+
+    def row(self, idx, output_cols):
+        """Project one row onto output_cols (columns missing from the CSV are skipped)"""
+        return self.store.project(idx, output_cols)
+
+
+class UnifiedIndex:
+    """One BM25 index over several SearchIndexes that share columns (e.g. every stack CSV).
+
+    Each document remembers which part it came from, so one scoring pass can
+    be filtered to a subset of parts, counted per part (facets) and ranked
+    per part. idf is computed over all parts, which keeps scores comparable
+    across parts (they can differ slightly from searching one part alone).
+    """
+
+    def __init__(self, parts):
+        self.parts = dict(parts)
+        self.names = list(self.parts)
+        self.codes = {name: code for code, name in enumerate(self.names)}
+        self.offsets = []
+        self.owner = array('I')
+        for code, index in enumerate(self.parts.values()):
+            self.offsets.append(len(self.owner))
+            self.owner.extend([code] * index.bm25.N)
+        self.bm25 = BM25.merge([index.bm25 for index in self.parts.values()])
+
+    def search(self, query_tokens, names=None, max_results=None):
+        """Score once, then return ({name: matching docs}, {name: [(local idx, score), ...] best first})"""
+        names = [name for name in (names or self.names) if name in self.codes]
+        wanted = {self.codes[name] for name in names}
+        owner = self.owner
+
+        groups = defaultdict(list)
+        for idx, score in self.bm25.scores(query_tokens).items():
+            code = owner[idx]
+            if code in wanted and score > 0:
+                groups[code].append((idx, score))
+
+        facets, ranked = {}, {}
+        for name in names:
+            code = self.codes[name]
+            items = groups.get(code, [])
+            facets[name] = len(items)
+            if max_results is not None:
+                items = heapq.nlargest(max_results, items, key=lambda x: (x[1], -x[0]))
+            else:
+                items = sorted(items, key=lambda x: (-x[1], x[0]))
+            offset = self.offsets[code]
+            ranked[name] = [(idx - offset, score) for idx, score in items]
+        return facets, ranked
+
+    def row(self, name, idx, output_cols):
+        """Project row idx of part name onto output_cols"""
+        return self.parts[name].row(idx, output_cols)
+
+
+# ============ BINARY INDEX FORMAT ============
+# File layout: magic, then uint64 offset and length of a JSON header, then
+# 8-byte aligned sections of native-endian machine values. The header names
+# each section's offset, typecode and length. Sections are read as
+# memoryviews of a read-only mmap: loading copies nothing, and processes
+# mapping the same file share its pages.
+_INDEX_MAGIC = b"UIPROIDX"
+_PREAMBLE = len(_INDEX_MAGIC) + 16
+
+
+def _pack_strings(strings):
+    """UTF-8 concatenation of strings plus an offsets array (n + 1 entries)"""
+    offsets, values = array('I', [0]), bytearray()
+    for string in strings:
+        values += string.encode("utf-8")
+        offsets.append(len(values))
+    return offsets, array('B', values)
+
+
+def _term_slots(terms):
+    """Open-addressing hash table (crc32 of UTF-8, linear probing) of term id + 1, 0 = empty"""
+    size = 1
+    while size < 2 * len(terms):
+        size *= 2
+    from zlib import crc32
+    slots = array('I', [0]) * size
+    for term_id, term in enumerate(terms):
+        h = crc32(term.encode("utf-8")) & (size - 1)
+        while slots[h]:
+            h = (h + 1) & (size - 1)
+        slots[h] = term_id + 1
+    return slots
+
+
+def _dump_sections(f, meta, sections):
+    import json
+    table = {}
+    f.write(b"\0" * _PREAMBLE)
+    pos = _PREAMBLE
+    for name, values in sections:
+        data = values.tobytes()
+        table[name] = [pos, values.typecode, len(values)]
+        f.write(data)
+        pos += len(data)
+        pad = -pos % 8
+        f.write(b"\0" * pad)
+        pos += pad
+    header = json.dumps(dict(meta, sections=table), ensure_ascii=False).encode("utf-8")
+    f.write(header)
+    f.seek(0)
+    f.write(_INDEX_MAGIC + pos.to_bytes(8, "little") + len(header).to_bytes(8, "little"))
+
+
+def _map_sections(path):
+    """(header, {name: memoryview}) of a binary index file, mapped read-only"""
+    # Artifact-only modules are imported here to keep `import core` cheap
+    import json
+    import mmap
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if bytes(view[:len(_INDEX_MAGIC)]) != _INDEX_MAGIC:
+        raise ValueError(f"Not an index file: {path}")
+    start = int.from_bytes(view[8:16], "little")
+    length = int.from_bytes(view[16:24], "little")
+    meta = json.loads(str(view[start:start + length], "utf-8"))
+    sections = {}
+    for name, (offset, typecode, count) in meta.pop("sections").items():
+        size = array(typecode).itemsize
+        sections[name] = view[offset:offset + count * size].cast(typecode)
+    return meta, sections
+
+
+class _MappedStrings:
+    """Read-only sequence of strings stored as UTF-8 values + offsets (null: the code that reads as None).
+
+    Entries are decoded on first access and kept, so only values that are
+    actually returned (hot result rows) take process memory.
+    """
+
+    __slots__ = ("offsets", "values", "null", "_decoded")
+
+    def __init__(self, offsets, values, null=None):
+        self.offsets = offsets
+        self.values = values
+        self.null = null
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        value = self._decoded.get(i)
+        if value is None:
+            if i == self.null:
+                return None
+            offsets = self.offsets
+            # offsets[i + 1] raises IndexError past the end, which also ends iteration
+            value = self._decoded[i] = str(self.values[offsets[i]:offsets[i + 1]], "utf-8")
+        return value
+
+    def raw(self, i):
+        """UTF-8 bytes of entry i as a memoryview"""
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+
+class MappedVocabulary:
+    """Vocabulary over a mapped term table and its hash slots (see _term_slots)"""
+
+    def __init__(self, terms, slots):
+        from zlib import crc32
+        self.terms = terms
+        self.slots = slots
+        self.ids = self
+        self._crc32 = crc32
+
+    def get(self, term):
+        key = term.encode("utf-8")
+        slots, mask = self.slots, len(self.slots) - 1
+        h = self._crc32(key) & mask
+        while True:
+            slot = slots[h]
+            if not slot:
+                return None
+            if self.terms.raw(slot - 1) == key:
+                return slot - 1
+            h = (h + 1) & mask
+
+    def copy(self):
+        return Vocabulary(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class _MappedPostings:
+    """postings[term_id] -> (doc_ids, tfs) slices of the mapped postings columns"""
+
+    __slots__ = ("offsets", "doc_ids", "tfs")
+
+    def __init__(self, offsets, doc_ids, tfs):
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, term_id):
+        if not 0 <= term_id < len(self.offsets) - 1:
+            raise IndexError(term_id)
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
 
-            scores.append((idx, score))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+class _MappedScorer(BM25Scorer):
+    """Scorer whose vocabulary, postings, idf, norms and doc lengths are views
+    into a mapped index file"""
+
+    def __init__(self, meta, sections):
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.N = meta["N"]
+        self.avgdl = meta["avgdl"]
+        self.boosts = meta["boosts"]
+        self.TF_TYPECODE = sections["post_tfs"].format
+        self.vocab = MappedVocabulary(_MappedStrings(sections["term_offsets"], sections["term_values"]),
+                                      sections["term_slots"])
+        self.postings = _MappedPostings(sections["post_offsets"], sections["post_docs"], sections["post_tfs"])
+        self.idf = sections["idf"]
+        self.norms = sections["norms"]
+        self.doc_lengths = sections["doc_lengths"]
+
+    @property
+    def doc_freqs(self):
+        offsets = self.postings.offsets
+        return array('I', [offsets[t + 1] - offsets[t] for t in range(len(offsets) - 1)])
+
+
+class MappedBM25(_MappedScorer):
+    """Mapped BM25 index; copy() materializes an in-memory BM25 that
+    add_documents/remove_documents can patch.
+    """
+
+    patchable = True
+
+    @property
+    def corpus(self):
+        """Per-document term ids rebuilt from the postings (term order within a document is not kept)"""
+        corpus = [array('I') for _ in range(self.N)]
+        for term_id, (doc_ids, tfs) in enumerate(self.postings):
+            for idx, tf in zip(doc_ids, tfs):
+                corpus[idx].extend([term_id] * tf)
+        return corpus
+
+    def copy(self):
+        """In-memory BM25 with the same content"""
+        bm25 = BM25(self.k1, self.b)
+        bm25.vocab = self.vocab.copy()
+        bm25.corpus = self.corpus
+        bm25.postings = [(array('I', doc_ids), array('I', tfs)) for doc_ids, tfs in self.postings]
+        bm25.doc_lengths = array('I', self.doc_lengths)
+        bm25.N = self.N
+        if bm25.N:
+            bm25._compute_stats()
+        return bm25
+
+
+class MappedBM25F(_MappedScorer):
+    """Mapped BM25F index. Its postings hold weighted frequencies, so there is
+    no corpus to patch: an edited CSV rebuilds it.
+    """
+
+
+# ============ PROCESS CACHE ============
+class _CacheEntry:
+    __slots__ = ("value", "signature", "checked")
+
+    def __init__(self, value, signature, checked):
+        self.value = value
+        self.signature = signature
+        self.checked = checked
+
+
+# Values derived from data files, shared by every caller in this process
+_CACHE = {}
+_CACHE_LOCK = allocate_lock()
+_BUILD_LOCKS = defaultdict(allocate_lock)
+
+
+def cached_load(filepath, kind, build, update=None, stored=None):
+    """Return build(signature) for a data file, cached process-wide.
+
+    kind distinguishes different values derived from the same file. The file
+    is re-stat'ed at most every STAT_INTERVAL seconds and the value is rebuilt
+    only when its content hash changes; if update is given it is tried first as
+    update(old_value, signature) and may return None to fall back to build.
+    stored, if given, returns the signature saved with an on-disk artifact (or
+    None); on a cold cache it lets an unchanged file skip the content hash.
+    Thread-safe; concurrent callers wait for a single build.
+    """
+    key = (filepath if isinstance(filepath, Path) else Path(filepath), kind)
+
+    entry = _CACHE.get(key)
+    if entry and time.monotonic() - entry.checked < STAT_INTERVAL:
+        return entry.value
+
+    with _CACHE_LOCK:
+        build_lock = _BUILD_LOCKS[key]
+
+    with build_lock:
+        entry = _CACHE.get(key)
+        now = time.monotonic()
+        if entry and now - entry.checked < STAT_INTERVAL:
+            return entry.value
+
+        previous = entry.signature if entry else stored() if stored else None
+        signature = _file_signature(key[0], previous)
+        if entry and entry.signature.get("sha256") == signature["sha256"]:
+            entry.signature = signature
+            entry.checked = now
+            return entry.value
+
+        value = update(entry.value, signature) if entry and update else None
+        if value is None:
+            value = build(signature)
+        with _CACHE_LOCK:
+            _CACHE[key] = _CacheEntry(value, signature, now)
+        return value
+
+
+def invalidate_cache(filepath=None):
+    """Drop cached values for one data file (or all files); returns how many were dropped"""
+    with _CACHE_LOCK:
+        keys = [key for key in _CACHE if filepath is None or key[0] == Path(filepath)]
+        for key in keys:
+            del _CACHE[key]
+    return len(keys)
+
+
+def cache_info():
+    """Describe the process cache: one entry per cached (file, kind)"""
+    with _CACHE_LOCK:
+        entries = list(_CACHE.items())
+    return [{"file": str(path), "kind": kind, "source": entry.signature} for (path, kind), entry in entries]
+
+
+def load_csv_cached(filepath):
+    """Parsed CSV rows (list of dicts), cached process-wide; callers must not mutate them"""
+    return cached_load(filepath, "rows", lambda signature: _load_csv(filepath))
+
+
+@traced("file_signature", "io")
+def _file_signature(filepath, previous=None):
+    """Stat + content hash of a CSV; the hash is reused when mtime and size are unchanged"""
+    st = filepath.stat()
+    signature = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if previous and previous.get("mtime_ns") == st.st_mtime_ns and previous.get("size") == st.st_size:
+        signature["sha256"] = previous.get("sha256")
+    else:
+        import hashlib  # only needed when a file is new or changed; keeps import time low
+        signature["sha256"] = hashlib.sha256(filepath.read_bytes()).hexdigest()
+    return signature
+
+
+def _index_path(filepath, search_cols, output_cols, boosts=None):
+    """Artifact path for a CSV and column config, e.g. stacks/react.csv -> .index/stacks__react.<config hash>.idx
+
+    The config hash keeps indexes of one CSV built with different columns or
+    boosts from overwriting each other.
+    """
+    import json
+    from zlib import crc32
+    try:
+        relative = filepath.resolve().relative_to(DATA_DIR.resolve())
+    except ValueError:
+        relative = Path(filepath.name)
+    config = json.dumps([search_cols, output_cols, sorted(boosts.items()) if boosts else None], ensure_ascii=False)
+    return INDEX_DIR / ("__".join(relative.with_suffix("").parts) + f".{crc32(config.encode('utf-8')):08x}.idx")
+
+
+def _csv_rows(reader, width):
+    """(fingerprint, values) per non-blank row; fingerprints are taken before short rows are padded"""
+    from hashlib import blake2b
+    for values in reader:
+        if not values:
+            continue  # csv.DictReader skips blank lines too
+        fingerprint = int.from_bytes(blake2b("\0".join(values).encode("utf-8"), digest_size=8).digest(), "little")
+        if len(values) < width:
+            # Short rows read as None, like csv.DictReader's restval
+            values += [None] * (width - len(values))
+        yield fingerprint, values
+
+
+def _column_positions(header, search_cols, store_cols):
+    # Last occurrence wins for duplicate headers, as with csv.DictReader
+    positions = {col: i for i, col in enumerate(header)}
+    return [positions.get(col) for col in search_cols], [positions[col] for col in store_cols]
+
+
+def _document(values, search_pos):
+    return " ".join("" if pos is None else str(values[pos]) for pos in search_pos)
+
+
+@traced("build_index", "index")
+def _build_index(filepath, search_cols, output_cols, signature, boosts=None):
+    """Stream the CSV once: search columns become BM25 documents, output columns go to a ColumnStore.
+
+    With boosts ({column: weight}) the index is a BM25F with one field per search column.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+
+        # Keep only output columns that actually exist in the file
+        store = ColumnStore([col for col in output_cols if col in header])
+        search_pos, store_pos = _column_positions(header, search_cols, store.columns)
+
+        documents = []
+        fingerprints = array('Q')
+        for fingerprint, values in _csv_rows(reader, len(header)):
+            fingerprints.append(fingerprint)
+            if boosts:
+                documents.append(["" if pos is None else str(values[pos]) for pos in search_pos])
+            else:
+                documents.append(_document(values, search_pos))
+            store.append([values[pos] for pos in store_pos])
+    store.seal()
+
+    bm25 = BM25F(boosts=[boosts.get(col, 1.0) for col in search_cols]) if boosts else BM25()
+    bm25.fit(documents)
+    return SearchIndex(bm25, store, signature, header, fingerprints)
+
+
+@traced("patch_index", "index")
+def _patch_index(index, filepath, search_cols, signature):
+    """Bring an index up to date with an edited CSV by re-indexing only what changed.
+
+    Rows are matched by fingerprint; everything after the first changed row is
+    removed from the index and the CSV's remaining rows are added back, so an
+    append tokenizes and posts only the new rows. The whole CSV is still read
+    and fingerprinted (after cached_load has hashed it): patching saves the
+    indexing work, not the I/O. Returns None (caller rebuilds) when the header
+    changed, more rows changed than stayed the same, or the index is a BM25F
+    (boosted configs such as styles.csv), whose postings depend on corpus-wide
+    field length averages.
+    """
+    if not index.bm25.patchable:
+        return None
+    old = index.fingerprints
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if header != index.header:
+            return None
+        search_pos, store_pos = _column_positions(header, search_cols, index.store.columns)
+
+        prefix = 0
+        fingerprints = array('Q')
+        documents, stored = [], []
+        for fingerprint, values in _csv_rows(reader, len(header)):
+            if prefix == len(fingerprints) and prefix < len(old) and old[prefix] == fingerprint:
+                prefix += 1
+            else:
+                documents.append(_document(values, search_pos))
+                stored.append([values[pos] for pos in store_pos])
+            fingerprints.append(fingerprint)
+
+    if (len(old) - prefix) + len(documents) > prefix:
+        return None
+
+    bm25 = index.bm25.copy()
+    if prefix < bm25.N:
+        bm25.remove_documents(range(prefix, bm25.N))
+    bm25.add_documents(documents)
+
+    store = index.store.copy()
+    store.truncate(prefix)
+    for values in stored:
+        store.append(values)
+    store.seal()
+    return SearchIndex(bm25, store, signature, header, fingerprints)
+
+
+@traced("read_index", "io")
+def _read_index(path, search_cols, output_cols, boosts=None):
+    """Map an index artifact built with the current format and column config (possibly for an older CSV)"""
+    try:
+        meta, sections = _map_sections(path)
+    except (OSError, ValueError):
+        return None
+
+    if (meta.get("version") != INDEX_FORMAT_VERSION
+            or meta.get("byteorder") != sys.byteorder
+            or meta.get("search_cols") != search_cols
+            or meta.get("output_cols") != output_cols
+            or meta.get("boosts") != boosts):
+        return None
+
+    store = ColumnStore(meta["columns"])
+    store.tables = [_MappedStrings(sections[f"col{c}_offsets"], sections[f"col{c}_values"], null)
+                    for c, null in enumerate(meta["null_codes"])]
+    store.codes = [sections[f"col{c}_codes"] for c in range(len(store.columns))]
+    return SearchIndex((MappedBM25F if meta["boosts"] else MappedBM25)(meta, sections), store, meta["source"], meta["header"], sections["fingerprints"])
+
+
+@traced("write_index", "io")
+def _write_index(path, index, search_cols, output_cols, boosts=None):
+    """Persist an index as a mappable binary artifact; a read-only data dir just means no cache"""
+    bm25, store = index.bm25, index.store
+    terms = bm25.vocab.terms
+    term_offsets, term_values = _pack_strings(terms)
+    post_offsets, post_docs, post_tfs = array('I', [0]), array('I'), array(bm25.TF_TYPECODE)
+    for doc_ids, tfs in bm25.postings:
+        post_docs.extend(doc_ids)
+        post_tfs.extend(tfs)
+        post_offsets.append(len(post_docs))
+
+    sections = [
+        ("term_offsets", term_offsets), ("term_values", term_values), ("term_slots", _term_slots(terms)),
+        ("post_offsets", post_offsets), ("post_docs", post_docs), ("post_tfs", post_tfs),
+        ("idf", array('d', bm25.idf)),
+        ("norms", array('d', bm25.norms)), ("doc_lengths", array('I', bm25.doc_lengths)),
+        ("fingerprints", array('Q', index.fingerprints)),
+    ]
+    null_codes = []
+    for c, table in enumerate(store.tables):
+        null_codes.append(next((code for code, value in enumerate(table) if value is None), None))
+        offsets, values = _pack_strings("" if value is None else value for value in table)
+        sections += [(f"col{c}_offsets", offsets), (f"col{c}_values", values), (f"col{c}_codes", array('I', store.codes[c]))]
+
+    meta = {
+        "version": INDEX_FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "source": index.source,
+        "search_cols": search_cols,
+        "output_cols": output_cols,
+        "boosts": boosts,
+        "header": index.header,
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "N": bm25.N,
+        "avgdl": bm25.avgdl,
+        "columns": store.columns,
+        "null_codes": null_codes
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            _dump_sections(f, meta, sections)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _index_kind(search_cols, output_cols, boosts=None):
+    """Process-cache kind of an index: one per column config"""
+    return ("index", tuple(search_cols), tuple(output_cols), tuple(sorted(boosts.items())) if boosts else None)
+
+
+def load_index(filepath, search_cols, output_cols, boosts=None):
+    """Return the BM25 index for a CSV, loading the on-disk artifact or rebuilding it if stale.
+
+    When the CSV changes, the in-memory (or on-disk) index is patched with
+    just the changed rows and the artifact is rewritten. boosts
+    ({column: weight}) selects BM25F field-weighted scoring; those indexes are
+    always rebuilt on change (see _patch_index).
+    """
+    if not isinstance(filepath, Path):
+        filepath = Path(filepath)
+
+    artifact = {}
+
+    def path():
+        # Resolved once per load: it stats the CSV's directory tree
+        if "path" not in artifact:
+            artifact["path"] = _index_path(filepath, search_cols, output_cols, boosts)
+        return artifact["path"]
+
+    def update(index, signature):
+        patched = _patch_index(index, filepath, search_cols, signature)
+        if patched is not None:
+            _write_index(path(), patched, search_cols, output_cols, boosts)
+        return patched
+
+    def stored():
+        # Mapped once here and handed to build(); the hash is skipped if the CSV's stat matches
+        artifact["index"] = _read_index(path(), search_cols, output_cols, boosts)
+        return artifact["index"].source if artifact["index"] is not None else None
+
+    def build(signature):
+        if "index" in artifact:
+            index = artifact.pop("index")
+        else:
+            index = _read_index(path(), search_cols, output_cols, boosts)
+        if index is not None and index.source.get("sha256") == signature["sha256"]:
+            index.source = signature
+            return index
+        index = update(index, signature) if index is not None else None
+        if index is None:
+            index = _build_index(filepath, search_cols, output_cols, signature, boosts)
+            _write_index(path(), index, search_cols, output_cols, boosts)
+        return index
+
+    return cached_load(filepath, _index_kind(search_cols, output_cols, boosts), build, update, stored)
+
+
+# ============ INDEX REGISTRY ============
+class IndexRegistry:
+    """Lazy name -> SearchIndex registry over CSV_CONFIG or STACK_CONFIG.
+
+    Nothing is read at import time: an entry's index is loaded (from its
+    on-disk artifact, or by fitting) on first access and then served from
+    the process cache. warm() preloads selected entries, optionally in
+    background threads.
+    """
+
+    def __init__(self, configs, shared_cols=None):
+        self.configs = configs
+        self.shared_cols = shared_cols or {}
+        self._paths = {}
+        self._unified = None
+        self._unified_lock = allocate_lock()
+
+    def __contains__(self, name):
+        return name in self.configs
+
+    def names(self):
+        return list(self.configs)
+
+    def config(self, name):
+        """search_cols/output_cols/file for one entry"""
+        return {**self.shared_cols, **self.configs[name]}
+
+    def path(self, name):
+        path = self._paths.get(name)
+        if path is None:
+            path = self._paths[name] = DATA_DIR / self.configs[name]["file"]
+        return path
+
+    def get(self, name):
+        """Index for name, loaded on first access; None if its CSV is missing"""
+        config = self.config(name)
+        try:
+            return load_index(self.path(name), config["search_cols"], config["output_cols"], config.get("boosts"))
+        except FileNotFoundError:
+            return None
+
+    def unified(self):
+        """UnifiedIndex over every entry whose CSV exists; rebuilt when any entry's index changes"""
+        parts = {}
+        for name in self.configs:
+            index = self.get(name)
+            if index is not None:
+                parts[name] = index
+        with self._unified_lock:
+            current = self._unified
+            if (current is None or list(current.parts) != list(parts)
+                    or any(current.parts[name] is not index for name, index in parts.items())):
+                current = self._unified = UnifiedIndex(parts)
+            return current
+
+    def warm(self, names=None, background=False):
+        """Preload names (default: all); with background=True returns the started daemon threads"""
+        names = [name for name in (names or self.configs) if name in self.configs]
+        if not background:
+            for name in names:
+                self.get(name)
+            return []
+        import threading
+        threads = [threading.Thread(target=self.get, args=(name,), name=f"warm-{name}", daemon=True) for name in names]
+        for thread in threads:
+            thread.start()
+        return threads
+
+
+DOMAINS = IndexRegistry(CSV_CONFIG)
+STACKS = IndexRegistry(STACK_CONFIG, _STACK_COLS)
+
+
+def warm(names=None, background=True):
+    """Preload domain/stack indexes. names: domain names and/or "stack:<name>" entries
+    ("all", "stacks" and None select everything / every stack). Returns started threads."""
+    if names is None or "all" in names:
+        names = DOMAINS.names() + [f"stack:{stack}" for stack in STACKS.names()]
+    if "stacks" in names:
+        names = [n for n in names if n != "stacks"] + [f"stack:{stack}" for stack in STACKS.names()]
+    domains = [n for n in names if not n.startswith("stack:")]
+    stacks = [n[len("stack:"):] for n in names if n.startswith("stack:")]
+    threads = DOMAINS.warm(domains, background) if domains else []
+    threads += STACKS.warm(stacks, background) if stacks else []
+    return threads
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """Bounded LRU (optionally TTL) cache of ranked results, thread-safe.
+
+    Keys include the source CSV's content hash, so an edited CSV never
+    serves old results; its stale entries simply age out.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = allocate_lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """Cached value for key (refreshing its LRU position), or None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, stored = item
+                if self.ttl > 0 and time.monotonic() - stored > self.ttl:
+                    del self._data[key]
+                    self.expirations += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions, "expirations": self.expirations}
+
+
+RESULT_CACHE = ResultCache()
+
+
+def _search_cached(kind, name, index, output_cols, query, max_results, tokens=None):
+    """_search_index() behind RESULT_CACHE, keyed on the query's token multiset and the index version"""
+    if tokens is None:
+        tokens = tokenize_query(query)
+    key = (kind, name, tuple(sorted(tokens)), max_results, index.source.get("sha256"))
+    rows = RESULT_CACHE.get(key)
+    if rows is None:
+        rows = tuple(_search_index(index, output_cols, query, max_results, tokens))
+        RESULT_CACHE.put(key, rows)
+    # Callers get their own dicts so the cached rows stay untouched
+    return [dict(row) for row in rows]
 
 
 # ============ SEARCH FUNCTIONS ============
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
+    with span("load_csv", "io", file=str(filepath)), open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
+def _search_csv(filepath, search_cols, output_cols, query, max_results, tokens=None, boosts=None):
+    """Core search function using BM25 (pass tokens to skip re-tokenizing the query).
+
+    Without boosts, a CSV_CONFIG entry for the same file and search columns
+    lends its boosts, so results rank as they do in search().
+    """
     if not filepath.exists():
         return []
+    if boosts is None:
+        boosts = _configured_boosts(filepath, tuple(search_cols))
 
-    data = _load_csv(filepath)
+    return _search_index(load_index(filepath, search_cols, output_cols, boosts), output_cols, query, max_results, tokens)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+@lru_cache(maxsize=64)
+def _configured_boosts(filepath, search_cols):
+    filepath = Path(filepath).resolve()
+    for config in CSV_CONFIG.values():
+        if (config.get("boosts") and tuple(config["search_cols"]) == search_cols
+                and (DATA_DIR / config["file"]).resolve() == filepath):
+            return config["boosts"]
+    return None
+
+
+def _search_index(index, output_cols, query, max_results, tokens=None):
+    """Rank one loaded index and project the top results onto output_cols"""
+    if tokens is None:
+        tokens = tokenize_query(query)
+    ranked = index.bm25.score_tokens(tokens, max_results)
 
     # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    with span("project", "project"):
+        return [index.row(idx, output_cols) for idx, score in ranked if score > 0]
 
-    return results
 
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
 
-def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
+@lru_cache(maxsize=None)
+def domain_matcher():
+    """KeywordMatcher over DOMAIN_KEYWORDS, built on the first detect_domain() call"""
+    return KeywordMatcher(DOMAIN_KEYWORDS)
+
+
+def detect_domain(query):
+    """Auto-detect the most relevant domain from query (the domain with most keyword hits)"""
+    scores = domain_matcher().counts(query)
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
+def _search_domain(query, domain, max_results, tokens=None):
+    """Search one CSV_CONFIG domain and wrap the results"""
+    name = domain if domain in DOMAINS else "style"
+    config = DOMAINS.config(name)
+    index = DOMAINS.get(name)
 
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
-    filepath = DATA_DIR / config["file"]
-
-    if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+    if index is None:
+        return {"error": f"File not found: {DOMAINS.path(name)}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results = _search_cached("domain", name, index, config["output_cols"], query, max_results, tokens)
 
     return {
         "domain": domain,
@@ -231,17 +1548,43 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     }
 
 
+def search(query, domain=None, max_results=MAX_RESULTS):
+    """Main search function with auto-domain detection"""
+    if domain is None:
+        domain = detect_domain(query)
+
+    with span("search", "search", domain=domain):
+        return _search_domain(query, domain, max_results)
+
+
+@traced("search_multi", "search")
+def search_multi(query, domains, tokens=None):
+    """Search several domains with one tokenization of the query.
+
+    domains maps domain -> max_results (a plain list uses MAX_RESULTS for each).
+    Pass tokens (from tokenize_query()) to reuse a tokenization across calls.
+    Returns {domain: search()-style result}.
+    """
+    if not isinstance(domains, dict):
+        domains = {domain: MAX_RESULTS for domain in domains}
+    if tokens is None:
+        tokens = tokenize_query(query)
+
+    return {domain: _search_domain(query, domain, max_results, tokens) for domain, max_results in domains.items()}
+
+
+@traced("search_stack", "search")
 def search_stack(query, stack, max_results=MAX_RESULTS):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
-    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+    index = STACKS.get(stack)
 
-    if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+    if index is None:
+        return {"error": f"Stack file not found: {STACKS.path(stack)}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results = _search_cached("stack", stack, index, _STACK_COLS["output_cols"], query, max_results)
 
     return {
         "domain": "stack",
@@ -251,3 +1594,68 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+
+
+@traced("search_stacks", "search")
+def search_stacks(query, stacks=None, max_results=MAX_RESULTS):
+    """Search several stacks (default: all) in one scoring pass over the unified stack index.
+
+    Returns per-stack top results plus facets: how many guidelines match in each stack.
+    stacks is a list of names or, as with --stacks, a comma-separated string ("all": every stack).
+    """
+    if isinstance(stacks, str):
+        stacks = None if stacks.strip() == "all" else [name.strip() for name in stacks.split(",") if name.strip()]
+    elif stacks is not None and (not isinstance(stacks, (list, tuple)) or not all(isinstance(s, str) for s in stacks)):
+        return {"error": f"stacks must be a list of stack names or a comma-separated string, got {stacks!r}"}
+    stacks = list(stacks) if stacks else list(AVAILABLE_STACKS)
+    unknown = [stack for stack in stacks if stack not in STACK_CONFIG]
+    if unknown:
+        return {"error": f"Unknown stack: {', '.join(unknown)}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+    union = STACKS.unified()
+    facets, ranked = union.search(tokenize_query(query), stacks, max_results)
+    results = {stack: [union.row(stack, idx, _STACK_COLS["output_cols"]) for idx, _ in hits]
+               for stack, hits in ranked.items()}
+
+    return {
+        "domain": "stack",
+        "stacks": stacks,
+        "query": query,
+        "facets": facets,
+        "count": sum(len(rows) for rows in results.values()),
+        "results": results
+    }
+
+
+@traced("search_batch", "search")
+def search_batch(queries, domains=None, max_results=MAX_RESULTS):
+    """Score many queries against several domains at once.
+
+    Each domain index is vectorized once (SparseBM25 when NumPy/SciPy are
+    installed) and all queries are scored in a single matrix product.
+    Returns one {domain: search()-style result} dict per query.
+    """
+    queries = list(queries)
+    domains = list(domains) if domains else list(CSV_CONFIG.keys())
+    batch = [{} for _ in queries]
+
+    for domain in domains:
+        name = domain if domain in DOMAINS else "style"
+        config = DOMAINS.config(name)
+        index = DOMAINS.get(name)
+        if index is None:
+            for item in batch:
+                item[domain] = {"error": f"File not found: {DOMAINS.path(name)}", "domain": domain}
+            continue
+        ranked = index.vectorized().score_batch(queries, max_results)
+        for query, item, hits in zip(queries, batch, ranked):
+            results = [index.row(idx, config["output_cols"]) for idx, score in hits if score > 0]
+            item[domain] = {
+                "domain": domain,
+                "query": query,
+                "file": config["file"],
+                "count": len(results),
+                "results": results
+            }
+
+    return batch
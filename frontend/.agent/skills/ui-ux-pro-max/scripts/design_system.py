@@ -13,12 +13,12 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
-import csv
 import json
 import os
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search_multi, tokenize_query, KeywordMatcher, cached_load, load_csv_cached, DATA_DIR
+from tracing import span, traced
 
 
 # ============ CONFIGURATION ============
@@ -33,57 +33,113 @@ SEARCH_CONFIG = {
 }
 
 
+# ============ REASONING RULE INDEX ============
+class ReasoningIndex:
+    """Lookup tables over ui-reasoning.csv rules, built once at load.
+
+    Matching follows the original three passes, each returning the first rule
+    (in file order) that matches:
+      1. exact:   UI_Category == category
+      2. partial: UI_Category is a substring of category, or vice versa
+      3. keyword: a word of UI_Category is a substring of category
+    Pass 1 is a dict lookup. Pass 3 and the first half of pass 2 run a
+    KeywordMatcher (keyword -> rule automaton) over the category once. The
+    "vice versa" half (category inside a UI_Category) has no such index
+    short of a substring table over every rule, so it scans the lowered
+    categories, stopping at the rule the automaton found. Results are
+    memoized per category.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.exact = {}        # UI_Category -> first rule position
+        self.categories = []   # lowercased UI_Category per rule
+        self.decision_rules = {}  # Decision_Rules JSON text -> parsed dict
+        self._cache = {}
+
+        keywords = {}
+        for pos, rule in enumerate(rules):
+            ui_cat = rule.get("UI_Category", "").lower()
+            self.exact.setdefault(ui_cat, pos)
+            self.categories.append(ui_cat)
+            keywords[pos] = ui_cat.replace("/", " ").replace("-", " ").split()
+
+            # Pre-parse decision rules JSON
+            text = rule.get("Decision_Rules", "{}")
+            if text not in self.decision_rules:
+                try:
+                    self.decision_rules[text] = json.loads(text)
+                except json.JSONDecodeError:
+                    self.decision_rules[text] = {}
+
+        # Labels are rule positions, so first() is the first matching rule in file order
+        self.category_matcher = KeywordMatcher({pos: [ui_cat] for pos, ui_cat in enumerate(self.categories)})
+        self.keyword_matcher = KeywordMatcher(keywords)
+
+    def find(self, category: str):
+        """Return the position of the matching rule, or None."""
+        category_lower = category.lower()
+        if category_lower in self._cache:
+            return self._cache[category_lower]
+
+        # Try exact match first
+        pos = self.exact.get(category_lower)
+
+        # Try partial match: a rule category inside category, or category inside an earlier one
+        if pos is None:
+            pos = self.category_matcher.first(category_lower)
+            limit = len(self.categories) if pos is None else pos
+            pos = next((i for i in range(limit) if category_lower in self.categories[i]), pos)
+
+        # Try keyword match
+        if pos is None:
+            pos = self.keyword_matcher.first(category_lower)
+
+        self._cache[category_lower] = pos
+        return pos
+
+
+def load_reasoning_index() -> ReasoningIndex:
+    """Reasoning rules and their lookup index, shared process-wide and rebuilt when the CSV changes."""
+    filepath = DATA_DIR / REASONING_FILE
+    if not filepath.exists():
+        return ReasoningIndex([])
+    return cached_load(filepath, "reasoning", lambda signature: ReasoningIndex(load_csv_cached(filepath)))
+
+
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
     def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+        self.reasoning_index = load_reasoning_index()
+        self.reasoning_data = self.reasoning_index.rules
 
     def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+        """Load reasoning rules from CSV (process-wide cache)."""
+        return load_reasoning_index().rules
+
+    def _multi_domain_search(self, query: str, style_priority: list = None,
+                             tokens: tuple = None, exclude: tuple = ()) -> dict:
+        """Execute searches across multiple domains with a single query tokenization."""
+        if tokens is None:
+            tokens = tokenize_query(query)
+        domains = {domain: config["max_results"] for domain, config in SEARCH_CONFIG.items() if domain not in exclude}
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
         results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+        if "style" in domains and style_priority:
+            # For style, also search with priority keywords
+            priority_query = " ".join(style_priority[:2])
+            combined_query = f"{query} {priority_query}"
+            results.update(search_multi(combined_query, {"style": domains.pop("style")}, tokens + tokenize_query(priority_query)))
+        results.update(search_multi(query, domains, tokens))
+
+        return {domain: results[domain] for domain in SEARCH_CONFIG if domain in results}
 
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+        pos = self.reasoning_index.find(category)
+        return self.reasoning_data[pos] if pos is not None else {}
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
@@ -101,12 +157,8 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
+        # Decision rules JSON was parsed at load time
+        decision_rules = dict(self.reasoning_index.decision_rules.get(rule.get("Decision_Rules", "{}"), {}))
 
         return {
             "pattern": rule.get("Recommended_Pattern", ""),
@@ -120,41 +172,23 @@ class DesignSystemGenerator:
         }
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
-        """Select best matching result based on priority keywords."""
+        """Select best matching result based on priority keywords.
+
+        The style index is field-weighted (BM25F, Style Category boosted), so
+        past an explicit style-name match the ranking order already decides.
+        """
         if not results:
             return {}
 
-        if not priority_keywords:
-            return results[0]
-
-        # First: try exact style name match
-        for priority in priority_keywords:
+        # Exact style name match for a reasoning-rule priority
+        for priority in priority_keywords or []:
             priority_lower = priority.lower().strip()
             for result in results:
                 style_name = result.get("Style Category", "").lower()
                 if priority_lower in style_name or style_name in priority_lower:
                     return result
 
-        # Second: score by keyword match in all fields
-        scored = []
-        for result in results:
-            result_str = str(result).lower()
-            score = 0
-            for kw in priority_keywords:
-                kw_lower = kw.lower().strip()
-                # Higher score for style name match
-                if kw_lower in result.get("Style Category", "").lower():
-                    score += 10
-                # Lower score for keyword field match
-                elif kw_lower in result.get("Keywords", "").lower():
-                    score += 3
-                # Even lower for other field matches
-                elif kw_lower in result_str:
-                    score += 1
-            scored.append((score, result))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return scored[0][1] if scored and scored[0][0] > 0 else results[0]
+        return results[0]
 
     def _extract_results(self, search_result: dict) -> list:
         """Extract results list from search result dict."""
@@ -162,31 +196,40 @@ class DesignSystemGenerator:
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
+        with span("design.generate", "design"):
+            return self._generate(query, project_name)
+
+    def _generate(self, query: str, project_name: str = None) -> dict:
         # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
-        category = "General"
-        if product_results:
-            category = product_results[0].get("Product Type", "General")
+        with span("design.product_search", "design"):
+            tokens = tokenize_query(query)
+            product_result = search_multi(query, {"product": 1}, tokens)["product"]
+            product_results = product_result.get("results", [])
+            category = "General"
+            if product_results:
+                category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
-        style_priority = reasoning.get("style_priority", [])
+        with span("design.reasoning", "design", product_type=category):
+            reasoning = self._apply_reasoning(category, {})
+            style_priority = reasoning.get("style_priority", [])
 
         # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        with span("design.multi_domain_search", "design"):
+            search_results = self._multi_domain_search(query, style_priority, tokens, exclude=("product",))
+            search_results["product"] = product_result  # Reuse product search
 
         # Step 4: Select best matches from each domain using priority
-        style_results = self._extract_results(search_results.get("style", {}))
-        color_results = self._extract_results(search_results.get("color", {}))
-        typography_results = self._extract_results(search_results.get("typography", {}))
-        landing_results = self._extract_results(search_results.get("landing", {}))
+        with span("design.select", "design"):
+            style_results = self._extract_results(search_results.get("style", {}))
+            color_results = self._extract_results(search_results.get("color", {}))
+            typography_results = self._extract_results(search_results.get("typography", {}))
+            landing_results = self._extract_results(search_results.get("landing", {}))
 
-        best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
-        best_color = color_results[0] if color_results else {}
-        best_typography = typography_results[0] if typography_results else {}
-        best_landing = landing_results[0] if landing_results else {}
+            best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
+            best_color = color_results[0] if color_results else {}
+            best_typography = typography_results[0] if typography_results else {}
+            best_landing = landing_results[0] if landing_results else {}
 
         # Step 5: Build final recommendation
         # Combine effects from both reasoning and style search
@@ -239,6 +282,7 @@ class DesignSystemGenerator:
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
+@traced("design.format", "design")
 def format_ascii_box(design_system: dict) -> str:
     """Format design system as ASCII box with emojis (MCP-style)."""
     project = design_system.get("project_name", "PROJECT")
@@ -364,6 +408,7 @@ def format_ascii_box(design_system: dict) -> str:
     return "\n".join(lines)
 
 
+@traced("design.format", "design")
 def format_markdown(design_system: dict) -> str:
     """Format design system as markdown."""
     project = design_system.get("project_name", "PROJECT")
@@ -488,7 +533,9 @@ def generate_design_system(query: str, project_name: str = None, output_format:
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+@traced("design.persist", "io")
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          master: bool = True) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
@@ -497,6 +544,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        master: If False, leave MASTER.md untouched and only write the page override
     
     Returns:
         dict with created file paths and status
@@ -519,10 +567,11 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     master_file = design_system_dir / "MASTER.md"
     
     # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    if master:
+        master_content = format_master_md(design_system)
+        with open(master_file, 'w', encoding='utf-8') as f:
+            f.write(master_content)
+        created_files.append(str(master_file))
     
     # If page is specified, create page override file with intelligent content
     if page:
@@ -539,6 +588,120 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     }
 
 
+# ============ BULK GENERATION ============
+def _slug(name: str) -> str:
+    return name.lower().replace(' ', '-')
+
+
+def _normalize_spec(spec) -> dict:
+    """Accept {"query", "project_name"/"project", "page", "page_query"} dicts or (query, project, page) tuples.
+
+    Raises ValueError for a spec without a usable query or with non-string fields.
+    """
+    if isinstance(spec, str):
+        spec = {"query": spec}
+    elif not isinstance(spec, dict):
+        try:
+            spec = dict(zip(("query", "project_name", "page"), spec))
+        except TypeError:
+            raise ValueError(f"expected a query string, tuple or dict, got {type(spec).__name__}")
+    normalized = {
+        "query": spec.get("query"),
+        "project_name": spec.get("project_name", spec.get("project")),
+        "page": spec.get("page"),
+        "page_query": spec.get("page_query") or spec.get("query")
+    }
+    if not isinstance(normalized["query"], str) or not normalized["query"].strip():
+        raise ValueError("spec needs a non-empty \"query\" string")
+    for key in ("project_name", "page", "page_query"):
+        if normalized[key] is not None and not isinstance(normalized[key], str):
+            raise ValueError(f"\"{key}\" must be a string")
+    return normalized
+
+
+def preload_design_data():
+    """Load every index generate_design_system touches (domains, page-override domains, reasoning rules)."""
+    from core import DOMAINS
+    DOMAINS.warm(list(SEARCH_CONFIG) + ["ux"])
+    load_reasoning_index()
+
+
+def _generate_one(job: tuple) -> dict:
+    """Worker: generate, optionally persist, and format one design system spec."""
+    spec, output_format, persist, output_dir, write_master, write_page = job
+    try:
+        design_system = DesignSystemGenerator().generate(spec["query"], spec["project_name"])
+        created_files = []
+        if persist and (write_master or write_page):
+            persisted = persist_design_system(design_system, spec["page"] if write_page else None,
+                                              output_dir, spec["page_query"], master=write_master)
+            created_files = persisted["created_files"]
+        output = format_markdown(design_system) if output_format == "markdown" else format_ascii_box(design_system)
+        return {**spec, "project_name": design_system["project_name"], "output": output, "created_files": created_files}
+    except Exception as e:
+        return {**spec, "error": f"{type(e).__name__}: {e}"}
+
+
+def generate_design_systems(specs, workers: int = None, output_format: str = "ascii",
+                            persist: bool = False, output_dir: str = None) -> list:
+    """
+    Generate many design systems across a process pool.
+
+    Args:
+        specs: Iterable of query strings, (query, project, page) tuples or
+            {"query", "project_name", "page", "page_query"} dicts
+        workers: Number of worker processes (default: CPU count; 1 runs in-process)
+        output_format: "ascii" (default) or "markdown"
+        persist: If True, write MASTER.md and page overrides for every spec
+        output_dir: Optional output directory (defaults to current working directory)
+
+    Returns:
+        One dict per spec, in input order, with the formatted "output" and
+        "created_files" (or "error"; an invalid spec gets {"spec", "error"})
+
+    Indexes are loaded before the pool starts so forked workers inherit them;
+    other start methods load them once per worker from the on-disk index.
+    When several specs share a project (or project + page), only the last one
+    writes that MASTER.md (or page file), matching what serial runs leave behind.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Invalid specs get their error result in place; only valid ones become jobs
+    results, valid = [], []
+    for spec in specs:
+        try:
+            valid.append((len(results), _normalize_spec(spec)))
+            results.append(None)
+        except ValueError as e:
+            results.append({"spec": spec, "error": f"Invalid spec: {e}"})
+    output_dir = str(Path(output_dir).resolve()) if output_dir else str(Path.cwd())
+
+    # Last writer per project / per project page, as in a serial run
+    last_master, last_page = {}, {}
+    for i, spec in valid:
+        project_slug = _slug(spec["project_name"] or spec["query"].upper())
+        last_master[project_slug] = i
+        if spec["page"]:
+            last_page[(project_slug, _slug(spec["page"]))] = i
+    jobs = []
+    for i, spec in valid:
+        project_slug = _slug(spec["project_name"] or spec["query"].upper())
+        write_page = bool(spec["page"]) and last_page[(project_slug, _slug(spec["page"]))] == i
+        jobs.append((spec, output_format, persist, output_dir, last_master[project_slug] == i, write_page))
+
+    if jobs:
+        preload_design_data()
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        generated = [_generate_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=preload_design_data) as pool:
+            generated = list(pool.map(_generate_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    for (i, _), result in zip(valid, generated):
+        results[i] = result
+    return results
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -911,6 +1074,29 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
     return "\n".join(lines)
 
 
+# Page type patterns, checked in order (first group with a keyword in the page context wins)
+PAGE_TYPE_PATTERNS = {
+    "Dashboard / Data View": ["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"],
+    "Checkout / Payment": ["checkout", "payment", "cart", "purchase", "order", "billing"],
+    "Settings / Profile": ["settings", "profile", "account", "preferences", "config"],
+    "Landing / Marketing": ["landing", "marketing", "homepage", "hero", "home", "promo"],
+    "Authentication": ["login", "signin", "signup", "register", "auth", "password"],
+    "Pricing / Plans": ["pricing", "plans", "subscription", "tiers", "packages"],
+    "Blog / Article": ["blog", "article", "post", "news", "content", "story"],
+    "Product Detail": ["product", "item", "detail", "pdp", "shop", "store"],
+    "Search Results": ["search", "results", "browse", "filter", "catalog", "list"],
+    "Empty State": ["empty", "404", "error", "not found", "zero"],
+}
+PAGE_TYPE_MATCHER = KeywordMatcher(PAGE_TYPE_PATTERNS)
+
+# Layout density inferred from a style's keywords (first group that matches wins)
+LAYOUT_MATCHER = KeywordMatcher({
+    "dense": ["data", "dense", "dashboard", "grid"],
+    "minimal": ["minimal", "simple", "clean", "single"],
+})
+
+
+@traced("design.page_overrides", "design")
 def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
     """
     Generate intelligent overrides based on page type using layered search.
@@ -918,16 +1104,15 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    page_search = search_multi(combined_context, {"style": 1, "ux": 3, "landing": 1})
+    style_search = page_search["style"]
+    ux_search = page_search["ux"]
+    landing_search = page_search["landing"]
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -955,11 +1140,12 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
         effects = style.get("Effects & Animation", "")
         
         # Infer layout from style keywords
-        if any(kw in keywords.lower() for kw in ["data", "dense", "dashboard", "grid"]):
+        density = LAYOUT_MATCHER.first(keywords)
+        if density == "dense":
             layout["Max Width"] = "1400px or full-width"
             layout["Grid"] = "12-column grid for data flexibility"
             spacing["Content Density"] = "High — optimize for information display"
-        elif any(kw in keywords.lower() for kw in ["minimal", "simple", "clean", "single"]):
+        elif density == "minimal":
             layout["Max Width"] = "800px (narrow, focused)"
             layout["Layout"] = "Single column, centered"
             spacing["Content Density"] = "Low — focus on clarity"
@@ -1019,25 +1205,10 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
 
 def _detect_page_type(context: str, style_results: list) -> str:
     """Detect page type from context and search results."""
-    context_lower = context.lower()
-    
     # Check for common page type patterns
-    page_patterns = [
-        (["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"], "Dashboard / Data View"),
-        (["checkout", "payment", "cart", "purchase", "order", "billing"], "Checkout / Payment"),
-        (["settings", "profile", "account", "preferences", "config"], "Settings / Profile"),
-        (["landing", "marketing", "homepage", "hero", "home", "promo"], "Landing / Marketing"),
-        (["login", "signin", "signup", "register", "auth", "password"], "Authentication"),
-        (["pricing", "plans", "subscription", "tiers", "packages"], "Pricing / Plans"),
-        (["blog", "article", "post", "news", "content", "story"], "Blog / Article"),
-        (["product", "item", "detail", "pdp", "shop", "store"], "Product Detail"),
-        (["search", "results", "browse", "filter", "catalog", "list"], "Search Results"),
-        (["empty", "404", "error", "not found", "zero"], "Empty State"),
-    ]
-    
-    for keywords, page_type in page_patterns:
-        if any(kw in context_lower for kw in keywords):
-            return page_type
+    page_type = PAGE_TYPE_MATCHER.first(context)
+    if page_type:
+        return page_type
     
     # Fallback: try to infer from style results
     if style_results:
@@ -3,6 +3,7 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py "<query>" --stacks [react,nextjs,vue | all]
        python search.py "<query>" --design-system [-p "Project Name"]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
 
@@ -12,13 +13,37 @@ Stacks: html-tailwind, react, nextjs
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+
+Search server (warm in-memory indexes):
+  python search.py --serve [--address unix:/tmp/uipro.sock] [--warm style,ux,stack:react]
+  Later queries are answered by the running server and fall back to
+  in-process search when it is not reachable.
+
+Warm-up: indexes load lazily on first use; --warm [NAMES] preloads the
+comma-separated domains ("stack:<name>", "stacks" or "all") in background
+threads. The server warms everything unless --warm narrows it.
+
+Batch mode (indexes built once, results streamed back in input order):
+  python search.py --batch [queries.jsonl] < queries.jsonl
+  Each input line: {"query": "...", "domain": "style", "stack": "react", "max_results": 3}
+  ("stacks": ["react", "vue"] or "react,vue" searches several stacks at once)
+  Each output line: the search()/search_stack() result as JSON
+
+Profiling (in-process; prints per-span timings to stderr):
+  python search.py "<query>" [--design-system] --profile [trace.json]
+  The optional file receives a Chrome trace (chrome://tracing, Perfetto).
+
+Bulk design systems (process pool, one JSON line per spec):
+  python search.py --design-system --batch specs.jsonl [--persist] [--workers 8]
+  Each input line: {"query": "...", "project_name": "...", "page": "..."}
 """
 
 import argparse
+import json
 import sys
 import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, warm
+from server import SearchClient, SearchServerError, serve
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -53,11 +78,79 @@ def format_output(result):
     return "\n".join(output)
 
 
+def format_stacks_output(result):
+    """Format cross-stack results: facet counts, then each stack's top results"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    output = [f"## UI Pro Max Cross-Stack Guidelines"]
+    output.append(f"**Query:** {result['query']} | **Found:** {result['count']} results")
+    output.append("**Matches per stack:** " + ", ".join(f"{stack} ({n})" for stack, n in result['facets'].items()) + "\n")
+
+    for stack, rows in result['results'].items():
+        if not rows:
+            continue
+        output.append(f"### {stack}")
+        for row in rows:
+            output.append(f"- **{row.get('Category', '')}:** {row.get('Guideline', '')}")
+            for key in ("Do", "Don't"):
+                if row.get(key):
+                    output.append(f"  - {key}: {row[key]}")
+        output.append("")
+
+    return "\n".join(output)
+
+
+def _batch_request(line, domain=None, stack=None, max_results=MAX_RESULTS):
+    """(SearchClient method name, args) for one batch line; raises ValueError, KeyError or TypeError if it is invalid"""
+    spec = json.loads(line)
+    if not isinstance(spec, dict):
+        raise TypeError(f"expected a JSON object, got {type(spec).__name__}")
+    query = spec["query"]
+    line_max = spec.get("max_results")
+    if line_max is None:
+        line_max = max_results
+    if not isinstance(line_max, int) or isinstance(line_max, bool):
+        raise TypeError(f"max_results must be an integer, got {line_max!r}")
+    if spec.get("stacks"):
+        return "search_stacks", (query, spec["stacks"], line_max)
+    line_stack = spec.get("stack", stack)
+    if line_stack:
+        return "search_stack", (query, line_stack, line_max)
+    return "search", (query, spec.get("domain", domain), line_max)
+
+
+def run_batch(lines, client, domain=None, stack=None, max_results=MAX_RESULTS):
+    """Answer one JSON query per line, yielding one JSON result line per input in order.
+
+    Fields missing from a line default to the CLI's --domain/--stack/--max-results.
+    An invalid line, an error answered by the server or a failed exchange
+    with it (e.g. a timeout) yields an {"error", "line"} object in place and
+    the run goes on; the client reconnects for the next line.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            method, args = _batch_request(line, domain, stack, max_results)
+        except (ValueError, KeyError, TypeError) as e:
+            result = {"error": f"Invalid batch line: {e}", "line": line.rstrip("\n")}
+        else:
+            try:
+                result = getattr(client, method)(*args)
+            except SearchServerError as e:
+                result = {"error": str(e), "line": line.rstrip("\n")}
+            except OSError as e:
+                result = {"error": f"Search server failed: {type(e).__name__}: {e}", "line": line.rstrip("\n")}
+        yield json.dumps(result, ensure_ascii=False)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--stacks", nargs="?", const="all", default=None, metavar="NAMES", help="Search several stacks at once: comma-separated names or all (default: all)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     # Design system generation
@@ -68,12 +161,75 @@ if __name__ == "__main__":
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Search server
+    parser.add_argument("--serve", action="store_true", help="Run a search server that keeps all indexes warm in memory")
+    parser.add_argument("--address", type=str, default=None, help="Server address: unix:/path.sock or host:port (default: $UIPRO_SEARCH_ADDR or a per-user Unix socket)")
+    parser.add_argument("--warm", nargs="?", const="all", default=None, metavar="NAMES", help="Preload indexes in background threads: comma-separated domains, stack:<name>, stacks or all (default: all)")
+    # Batch mode
+    parser.add_argument("--batch", nargs="?", const="-", default=None, metavar="FILE", help="Read JSONL queries from FILE (default: stdin) and stream JSONL results")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE", help="Time I/O, indexing and scoring in-process; summary to stderr, optional Chrome trace JSON file")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes for --design-system --batch (default: CPU count)")
 
     args = parser.parse_args()
+    warm_names = [name.strip() for name in args.warm.split(",") if name.strip()] if args.warm else None
+
+    if args.serve:
+        try:
+            serve(args.address, warm_names)
+        except (RuntimeError, OSError) as e:
+            # Another server already owns the address, or the socket directory is not private
+            sys.exit(f"Error: {e}")
+        sys.exit(0)
+    if args.query is None and args.batch is None:
+        parser.error("the following arguments are required: query")
+
+    client = SearchClient(args.address, remote=args.profile is None)
+    if args.profile is not None:
+        import atexit
+        import tracing
+        recorder = tracing.Recorder()
+        tracing.add_hook(recorder)
+
+        def _report():
+            tracing.remove_hook(recorder)
+            print("\n" + recorder.format_summary(), file=sys.stderr)
+            if args.profile:
+                recorder.write_chrome_trace(args.profile)
+                print(f"Chrome trace written to {args.profile}", file=sys.stderr)
+        # sys.exit() paths (batch modes) still report
+        atexit.register(_report)
+    if warm_names:
+        warm(warm_names, background=True)
+
+    if args.batch is not None and args.design_system:
+        from design_system import generate_design_systems
+        source = sys.stdin if args.batch == "-" else open(args.batch, 'r', encoding='utf-8')
+        # Malformed lines become error lines in place instead of aborting the run
+        parsed = []
+        with source:
+            for line in source:
+                if not line.strip():
+                    continue
+                try:
+                    parsed.append((json.loads(line), None))
+                except ValueError as e:
+                    parsed.append((None, {"error": f"Invalid batch line: {e}", "line": line.rstrip("\n")}))
+        results = iter(generate_design_systems([spec for spec, error in parsed if error is None], args.workers,
+                                               args.format, persist=args.persist, output_dir=args.output_dir))
+        for spec, error in parsed:
+            print(json.dumps(error or next(results), ensure_ascii=False), flush=True)
+        sys.exit(0)
+
+    if args.batch is not None:
+        source = sys.stdin if args.batch == "-" else open(args.batch, 'r', encoding='utf-8')
+        with source:
+            for out_line in run_batch(source, client, args.domain, args.stack, args.max_results):
+                print(out_line, flush=True)
+        sys.exit(0)
 
     # Design system takes priority
     if args.design_system:
-        result = generate_design_system(
+        result = client.generate_design_system(
             args.query, 
             args.project_name, 
             args.format,
@@ -96,19 +252,25 @@ if __name__ == "__main__":
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
+    # Cross-stack search
+    elif args.stacks:
+        stacks = None if args.stacks == "all" else [name.strip() for name in args.stacks.split(",") if name.strip()]
+        result = client.search_stacks(args.query, stacks, args.max_results)
+        if args.json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print(format_stacks_output(result))
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = client.search_stack(args.query, args.stack, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = client.search(args.query, args.domain, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Server - keeps every domain/stack index warm in one process
+
+Usage:
+    python search.py --serve [--address unix:/tmp/uipro.sock | --address 127.0.0.1:8765]
+
+    from server import SearchClient
+    client = SearchClient()                 # falls back to in-process search if no server
+    client.search("SaaS dashboard", "product", 1)
+
+Protocol: one JSON object per line in each direction over a Unix socket
+(or localhost TCP where AF_UNIX is unavailable).
+    -> {"op": "search", "args": {"query": "...", "domain": "style", "max_results": 3}}
+    <- {"ok": true, "result": {...}}
+"""
+
+import json
+import os
+import stat
+
+# ============ CONFIGURATION ============
+ADDRESS_ENV = "UIPRO_SEARCH_ADDR"
+DEFAULT_TCP_ADDRESS = "127.0.0.1:8765"
+CLIENT_TIMEOUT = 5.0
+
+
+def _private_dir():
+    """Per-user directory for the default socket: $XDG_RUNTIME_DIR, else <tmp>/uipro-<uid>"""
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.environ["XDG_RUNTIME_DIR"]
+    # $TMPDIR as tempfile.gettempdir() would pick it, without importing tempfile (and shutil, random...)
+    return os.path.join(os.environ.get("TMPDIR") or "/tmp", f"uipro-{os.getuid()}")
+
+
+def _check_private_dir(path):
+    """Raise PermissionError unless path is a directory (not a symlink) owned by this user with mode 0700.
+
+    Only the owner can then create or replace the socket inside it, so
+    neither side can be impersonated through a shared /tmp.
+    """
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by uid {os.getuid()} with mode 0700")
+
+
+def default_address():
+    """Server address from $UIPRO_SEARCH_ADDR, else a Unix socket in a private per-user directory (TCP on Windows)"""
+    if os.environ.get(ADDRESS_ENV):
+        return os.environ[ADDRESS_ENV]
+    if os.name != "nt":
+        return "unix:" + os.path.join(_private_dir(), "uipro-search.sock")
+    return DEFAULT_TCP_ADDRESS
+
+
+def _is_default(address):
+    return not (address or os.environ.get(ADDRESS_ENV)) and os.name != "nt"
+
+
+def _parse_address(address):
+    """'unix:/path/to.sock' -> ("unix", path); 'host:port' -> ("tcp", (host, port))"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class SearchServerError(RuntimeError):
+    """A request the server received but answered with an error"""
+
+
+# ============ DISPATCH ============
+def dispatch(op, args):
+    """Run one request in this process"""
+    if op == "ping":
+        return "pong"
+    if op == "stats":
+        from core import RESULT_CACHE, cache_info
+        return {"result_cache": RESULT_CACHE.info(), "indexes": cache_info()}
+    if op == "search":
+        from core import search
+        return search(**args)
+    if op == "search_stack":
+        from core import search_stack
+        return search_stack(**args)
+    if op == "search_stacks":
+        from core import search_stacks
+        return search_stacks(**args)
+    if op == "generate_design_system":
+        from design_system import generate_design_system
+        return generate_design_system(**args)
+    raise ValueError(f"Unknown op: {op}")
+
+
+def warm(names=None, background=False):
+    """Load domain and stack indexes into memory (default: all of them)"""
+    import core
+    return core.warm(names, background)
+
+
+# ============ SERVER ============
+def _make_server(kind, target):
+    """Threaded socketserver answering JSON-line requests until each client closes its connection.
+
+    socketserver is imported here, not at module level: every CLI query
+    imports this module for SearchClient, and only --serve needs a server.
+    """
+    import socketserver
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    response = {"ok": True, "result": dispatch(request.get("op"), request.get("args", {}))}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    if kind == "tcp":
+        class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+    else:
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+    return Server(target, RequestHandler)
+
+
+def _remove_stale_socket(path):
+    """Unlink a socket left behind by a server that is gone.
+
+    Raises instead when a server still answers on it (starting a second one
+    would silently take its address) or when path is not a socket.
+    """
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"A search server is already listening on unix:{path}")
+    finally:
+        sock.close()
+
+
+def serve(address=None, warm_names=None):
+    """Serve requests until interrupted, warming indexes in background threads.
+
+    Requests for an index that is still loading wait for it; anything not
+    in warm_names (default: all) is loaded on first use. Refuses to start
+    when another server already answers on a Unix socket address.
+    """
+    import signal
+    private = _is_default(address)
+    address = address or default_address()
+    kind, target = _parse_address(address)
+
+    if kind == "unix":
+        if private:
+            os.makedirs(os.path.dirname(target), mode=0o700, exist_ok=True)
+            _check_private_dir(os.path.dirname(target))
+        _remove_stale_socket(target)
+    server = _make_server(kind, target)
+    warm(warm_names, background=True)
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+
+    print(f"UI Pro Max search server listening on {address}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+
+# ============ CLIENT ============
+class SearchClient:
+    """Thin client for the search server; runs requests in-process when no server answers.
+
+    remote=False skips the server entirely (e.g. to profile in-process work).
+    """
+
+    def __init__(self, address=None, timeout=CLIENT_TIMEOUT, fallback=True, remote=True):
+        # The default socket is only trusted inside a private directory (see _check_private_dir)
+        self._private = _is_default(address)
+        self.address = address or default_address()
+        self.timeout = timeout
+        self.fallback = fallback
+        self.remote = remote
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        kind, target = _parse_address(self.address)
+        if kind == "unix":
+            if not os.path.exists(target):
+                # No server running: fall back without paying for the socket import
+                raise FileNotFoundError(f"No search server at {target}")
+            if self._private:
+                _check_private_dir(os.path.dirname(target))
+        import socket
+        sock = socket.socket(socket.AF_UNIX if kind == "unix" else socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def close(self):
+        """Close the server connection (if any)"""
+        if self._file:
+            self._file.close()
+        if self._sock:
+            self._sock.close()
+        self._sock = self._file = None
+
+    def _send(self, op, args):
+        if self._sock is None:
+            self._connect()
+        self._file.write(json.dumps({"op": op, "args": args}, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def _receive(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Search server closed the connection")
+        try:
+            response = json.loads(line)
+        except ValueError as e:
+            # The stream is out of step with the server: drop the connection
+            self.close()
+            raise SearchServerError(f"Malformed response from search server: {e}") from e
+        if not response.get("ok"):
+            raise SearchServerError(response.get("error", "Search server error"))
+        return response["result"]
+
+    def call(self, op, **args):
+        """Send one request to the server, falling back to in-process execution.
+
+        Only a failure to connect or to send falls back. Once the request is
+        out, errors (a timeout included) are raised: the server may still be
+        running it, and running it here too would repeat side effects such as
+        persisted files.
+        """
+        if not self.remote:
+            return dispatch(op, args)
+        try:
+            self._send(op, args)
+        except OSError:
+            self.close()
+            if not self.fallback:
+                raise
+            return dispatch(op, args)
+        try:
+            return self._receive()
+        except OSError:
+            self.close()
+            raise
+
+    def search(self, query, domain=None, max_results=None):
+        args = {"query": query, "domain": domain}
+        if max_results is not None:
+            args["max_results"] = max_results
+        return self.call("search", **args)
+
+    def search_stack(self, query, stack, max_results=None):
+        args = {"query": query, "stack": stack}
+        if max_results is not None:
+            args["max_results"] = max_results
+        return self.call("search_stack", **args)
+
+    def search_stacks(self, query, stacks=None, max_results=None):
+        args = {"query": query, "stacks": stacks}
+        if max_results is not None:
+            args["max_results"] = max_results
+        return self.call("search_stacks", **args)
+
+    def stats(self):
+        """Result-cache counters and loaded indexes of the server (or this process)"""
+        return self.call("stats")
+
+    def generate_design_system(self, query, project_name=None, output_format="ascii",
+                               persist=False, page=None, output_dir=None):
+        # Persisted files belong in the caller's directory, not the server's
+        if persist:
+            output_dir = os.path.abspath(output_dir or os.getcwd())
+        return self.call("generate_design_system", query=query, project_name=project_name,
+                         output_format=output_format, persist=persist, page=page, output_dir=output_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Tracing - opt-in timing spans for the search hot path
+
+Usage:
+    python search.py "SaaS dashboard" --profile [trace.json]
+
+    import tracing
+    recorder = tracing.Recorder()
+    tracing.add_hook(recorder)
+    ...                                   # search(), generate_design_system(), ...
+    tracing.remove_hook(recorder)
+    print(recorder.format_summary())
+    recorder.write_chrome_trace("trace.json")   # open in chrome://tracing or Perfetto
+
+Spans are tagged with a category so a slow session can be split into
+io (CSV / artifact reads and writes), index (building / patching),
+score, sort, project (result rows) and design (design-system steps).
+With no hook registered, span() returns a shared no-op context manager.
+"""
+
+import os
+import time
+from _thread import allocate_lock, get_ident  # what threading would provide, without its import cost
+from functools import wraps
+
+# ============ HOOKS ============
+# Callables receiving every finished SpanRecord
+_HOOKS = []
+_HOOKS_LOCK = allocate_lock()
+
+
+class SpanRecord:
+    """One finished span: times are time.perf_counter() seconds"""
+
+    __slots__ = ("name", "category", "start", "duration", "thread_id", "args")
+
+    def __init__(self, name, category, start, duration, thread_id, args):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = duration
+        self.thread_id = thread_id
+        self.args = args
+
+
+def add_hook(hook):
+    """Register a callable hook(record) that receives every finished span"""
+    global _HOOKS
+    with _HOOKS_LOCK:
+        # Copy-on-write so span() can read _HOOKS without locking
+        _HOOKS = _HOOKS + [hook]
+
+
+def remove_hook(hook):
+    global _HOOKS
+    with _HOOKS_LOCK:
+        _HOOKS = [h for h in _HOOKS if h is not hook]
+
+
+def enabled():
+    return bool(_HOOKS)
+
+
+# ============ SPANS ============
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        record = SpanRecord(self.name, self.category, self.start, end - self.start, get_ident(), self.args)
+        for hook in _HOOKS:
+            hook(record)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, category="", **args):
+    """Context manager timing the enclosed block; free when no hook is registered"""
+    if not _HOOKS:
+        return _NO_SPAN
+    return _Span(name, category, args)
+
+
+def traced(name, category=""):
+    """Decorator form of span() for whole functions"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _HOOKS:
+                return fn(*args, **kwargs)
+            with _Span(name, category, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ============ RECORDER / EXPORTERS ============
+class Recorder:
+    """Hook that keeps every span; exports a summary or a Chrome trace"""
+
+    def __init__(self):
+        self.records = []
+        self.origin = time.perf_counter()
+        self._lock = allocate_lock()
+
+    def __call__(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self):
+        """Per-span totals, slowest first: [{"name", "category", "calls", "total_ms", "mean_ms", "max_ms"}]"""
+        totals = {}
+        for record in self.records:
+            item = totals.setdefault((record.category, record.name), [0, 0.0, 0.0])
+            item[0] += 1
+            item[1] += record.duration
+            item[2] = max(item[2], record.duration)
+        rows = [{"name": name, "category": category, "calls": calls,
+                 "total_ms": round(total * 1000, 3), "mean_ms": round(total / calls * 1000, 3),
+                 "max_ms": round(longest * 1000, 3)}
+                for (category, name), (calls, total, longest) in totals.items()]
+        return sorted(rows, key=lambda row: -row["total_ms"])
+
+    def format_summary(self):
+        """Summary as a fixed-width table (span totals include nested spans)"""
+        lines = [f"{'category':<9} {'span':<34} {'calls':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for row in self.summary():
+            lines.append(f"{row['category']:<9} {row['name']:<34} {row['calls']:>6} "
+                         f"{row['total_ms']:>10.3f} {row['mean_ms']:>9.3f} {row['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self):
+        """Trace Event Format ("X" complete events, microseconds) for chrome://tracing / Perfetto"""
+        pid = os.getpid()
+        events = [{"name": record.name, "cat": record.category, "ph": "X",
+                   "ts": round((record.start - self.origin) * 1e6, 3), "dur": round(record.duration * 1e6, 3),
+                   "pid": pid, "tid": record.thread_id, "args": record.args}
+                  for record in self.records]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        import json
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)